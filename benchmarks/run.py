@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from srcstudiomodel import MDL, VTX, VVD, ModelBundle, ModelCache, Morph, Skeleton, assemble, probe_mdl, skin
+
+from .synthetic import SyntheticModel, generate
+
+# size tiers, from a prop to a heavily animated character
+TIERS: Dict[str, Dict[str, Any]] = {
+    'small': dict(
+        num_bones=8, num_models=1, meshes_per_model=2, verts_per_mesh=200,
+        num_lods=1, num_anims=2, num_frames=30, num_seqs=2,
+    ),
+    'medium': dict(
+        num_bones=53, num_models=2, meshes_per_model=4, verts_per_mesh=2000, strip_groups_per_mesh=2,
+        num_lods=3, num_anims=8, num_frames=120, section_frames=30, num_seqs=8, num_textures=4,
+        num_flexes=8, reduce_lods=True,
+    ),
+    'large': dict(
+        num_bones=128, num_models=2, meshes_per_model=6, verts_per_mesh=8000, strip_groups_per_mesh=2,
+        num_lods=4, num_anims=16, num_frames=200, section_frames=60, num_seqs=16, num_textures=6,
+        num_flexes=32, reduce_lods=True,
+    ),
+}
+
+
+class Context:
+    # the files of one tier, written to disk, and already parsed objects for the hot paths
+    model: SyntheticModel
+    path: str
+    bundle: ModelBundle
+    skeleton: Skeleton
+    bind: np.ndarray
+    cache: ModelCache
+    morph: Morph
+    # every flex controller half way
+    controllers: np.ndarray
+
+    def __init__(self, model: SyntheticModel, directory: str):
+        self.model = model
+        self.path = model.write(directory)
+        self.bundle = ModelBundle(self.path)
+        self.skeleton = Skeleton(self.bundle.mdl.bone_table)
+        self.bind = self.skeleton.bind_matrices()
+        self.cache = ModelCache(os.path.join(directory, 'cache'))
+        self.cache.load(self.path)
+        self.morph = Morph(self.bundle.mdl, self.bundle.vvd)
+        self.controllers = np.full(len(self.morph.controllers), 0.5)
+
+
+def _anim_decode(ctx: Context):
+    # a freshly loaded model every time, sections are cached once decoded
+    for anim_desc in MDL(ctx.model.mdl, lazy=True).anim_descs:
+        anim_desc.local_pose()
+
+
+def _animate(ctx: Context):
+    for anim_desc in MDL(ctx.model.mdl, lazy=True).anim_descs:
+        ctx.skeleton.animate(anim_desc)
+
+
+def _sample_frame(ctx: Context):
+    # one frame in the middle of a clip of a freshly loaded model, all sections cold
+    anim_desc = MDL(ctx.model.mdl, lazy=True).anim_descs[-1]
+    anim_desc.sample([(anim_desc.num_frames - 1) / 2])
+
+
+def _last_lod(ctx: Context) -> int:
+    return ctx.bundle.vtx.num_lods - 1
+
+
+# name -> what one sample runs
+CASES: Dict[str, Callable[[Context], Any]] = {
+    'probe_mdl': lambda ctx: probe_mdl(ctx.path),
+    'mdl': lambda ctx: MDL(ctx.model.mdl),
+    'vvd': lambda ctx: VVD(ctx.model.vvd),
+    'vtx': lambda ctx: VTX(ctx.model.vtx),
+    'vtx_last_lod': lambda ctx: VTX(ctx.model.vtx, lods=[_last_lod(ctx)]),
+    'bundle': lambda ctx: ModelBundle(ctx.path),
+    'bundle_last_lod': lambda ctx: ModelBundle(ctx.path, lods=[_last_lod(ctx)]),
+    'anim_decode': _anim_decode,
+    'animate': _animate,
+    'sample_frame': _sample_frame,
+    'morph': lambda ctx: Morph(ctx.bundle.mdl, ctx.bundle.vvd),
+    'flex': lambda ctx: ctx.morph.apply(ctx.bundle.vvd, ctx.controllers),
+    'skin': lambda ctx: skin(ctx.bundle.vvd, ctx.bind, ctx.skeleton.pose_to_bone),
+    'assemble': lambda ctx: assemble(ctx.bundle.mdl, ctx.bundle.vtx, ctx.bundle.vvd),
+    'assemble_last_lod': lambda ctx: assemble(ctx.bundle.mdl, ctx.bundle.vtx, ctx.bundle.vvd, _last_lod(ctx)),
+    'cache_hit': lambda ctx: ctx.cache.load(ctx.path),
+}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    # timing runs enough calls per sample to last at least 0.2s, like timeit does.
+    # memory is the tracemalloc peak of a single separate call, since tracing slows everything down
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    samples = [t / number for t in timer.repeat(repeat, number)]
+    tracemalloc.start()
+    try:
+        func()
+        (_, peak) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': min(samples),
+        'median': float(np.median(samples)),
+        'mean': float(np.mean(samples)),
+        'peak_bytes': peak,
+    }
+
+
+def run(
+    tiers: List[str],
+    cases: Optional[List[str]] = None,
+    repeat: int = 5,
+    seed: int = 0,
+    progress: Optional[Callable[[str, str], None]] = None,
+) -> Dict[str, Any]:
+    results = []
+    for tier in tiers:
+        model = generate(seed=seed, **TIERS[tier])
+        with tempfile.TemporaryDirectory() as directory:
+            ctx = Context(model, directory)
+            for name in cases or CASES:
+                if progress is not None:
+                    progress(tier, name)
+                results.append({
+                    'tier': tier,
+                    'case': name,
+                    **measure(lambda: CASES[name](ctx), repeat),
+                })
+    try:
+        from importlib.metadata import version
+        package_version = version('srcstudiomodel')
+    except Exception:
+        package_version = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'srcstudiomodel': package_version,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': seed,
+        'tiers': {tier: TIERS[tier] for tier in tiers},
+        'results': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description='time and memory profile parsing of synthetic models and write the results as json',
+    )
+    parser.add_argument('-t', '--tier', action='append', choices=list(TIERS), help='size tiers (default: all)')
+    parser.add_argument('-c', '--case', action='append', choices=list(CASES), help='cases to run (default: all)')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='samples per case')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic models')
+    parser.add_argument('-o', '--output', help='json file to write (default: stdout)')
+    args = parser.parse_args(argv)
+
+    def report(tier: str, case: str):
+        print('%s/%s' % (tier, case), file=sys.stderr)
+
+    result = run(args.tier or list(TIERS), args.case, args.repeat, args.seed, report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+    for entry in result['results']:
+        print('%-8s %-12s %12.1fus %12d bytes' % (
+            entry['tier'], entry['case'], entry['min'] * 1e6, entry['peak_bytes']), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,440 @@
+import math
+import os
+import random
+import struct
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# deterministic synthetic mdl/vvd/vtx files for benchmarking, with no game assets involved.
+# the same arguments always produce byte identical files
+
+
+class SyntheticModel(NamedTuple):
+    mdl: bytes
+    vvd: bytes
+    vtx: bytes
+    # external animation blocks, only when generated with anim_block_size
+    ani: Optional[bytes] = None
+
+    def write(self, directory: Union[str, os.PathLike], name: str = 'model') -> str:
+        # writes name.mdl, name.vvd, name.dx90.vtx and name.ani and returns the path of the mdl
+        base = os.path.join(directory, name)
+        for suffix, data in (('.mdl', self.mdl), ('.vvd', self.vvd), ('.dx90.vtx', self.vtx), ('.ani', self.ani)):
+            if data is None:
+                continue
+            with open(base + suffix, 'wb') as f:
+                f.write(data)
+        return base + '.mdl'
+
+
+class _Blob:
+    def __init__(self):
+        self.data = bytearray()
+
+    def tell(self) -> int:
+        return len(self.data)
+
+    def write(self, b: bytes) -> int:
+        offset = len(self.data)
+        self.data += b
+        return offset
+
+    def pack(self, format: str, *values) -> int:
+        return self.write(struct.pack(format, *values))
+
+    def reserve(self, size: int) -> int:
+        return self.write(bytes(size))
+
+    def put(self, offset: int, format: str, *values):
+        struct.pack_into(format, self.data, offset, *values)
+
+    def align(self, n: int = 4):
+        self.data += bytes(-len(self.data) % n)
+
+
+def _angle_quaternion(angles: Sequence[float]) -> Tuple[float, float, float, float]:
+    sy, cy = math.sin(angles[2] * .5), math.cos(angles[2] * .5)
+    sp, cp = math.sin(angles[1] * .5), math.cos(angles[1] * .5)
+    sr, cr = math.sin(angles[0] * .5), math.cos(angles[0] * .5)
+    return (sr * cp * cy - cr * sp * sy, cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy, cr * cp * cy + sr * sp * sy)
+
+
+def _matrix(quat: Sequence[float], pos: Sequence[float]) -> np.ndarray:
+    x, y, z, w = quat
+    return np.array([
+        [1 - 2 * y * y - 2 * z * z, 2 * x * y - 2 * w * z, 2 * x * z + 2 * w * y, pos[0]],
+        [2 * x * y + 2 * w * z, 1 - 2 * x * x - 2 * z * z, 2 * y * z - 2 * w * x, pos[1]],
+        [2 * x * z - 2 * w * y, 2 * y * z + 2 * w * x, 1 - 2 * x * x - 2 * y * y, pos[2]],
+        [0, 0, 0, 1],
+    ])
+
+
+def _rle(values: np.ndarray, rng: random.Random) -> bytes:
+    # mstudioanimvalue_t runs. frames past `valid` in a run repeat its last value, so the
+    # stream is rewritten in place to stay consistent with what it encodes
+    out = bytearray()
+    i = 0
+    while i < len(values):
+        total = min(rng.randint(1, 6), len(values) - i)
+        valid = rng.randint(1, total)
+        values[i + valid:i + total] = values[i + valid - 1]
+        out += struct.pack('=BB', valid, total)
+        out += values[i:i + valid].astype('<i2').tobytes()
+        i += total
+    return bytes(out)
+
+
+def _section_spans(num_frames: int, section_frames: int) -> List[Tuple[int, int]]:
+    # (first frame, frame count) of every section; the last frame is stored in a section of its own
+    if not section_frames:
+        return [(0, num_frames)]
+    num_sections = num_frames // section_frames + 2
+    spans = []
+    for s in range(num_sections):
+        if s < num_sections - 2:
+            spans.append((s * section_frames, section_frames))
+        elif s == num_sections - 2:
+            first = s * section_frames
+            last = num_frames - 1 if num_frames > section_frames else num_frames
+            spans.append((first, max(last - first, 0)))
+        else:
+            spans.append((num_frames - 1, 1))
+    return spans
+
+
+def _write_anim(
+    blob: _Blob, rng: random.Random, nprng: np.random.Generator, anim: int, num_bones: int, count: int,
+):
+    # one mstudioanim_t per bone covering `count` frames
+    previous: Optional[int] = None
+    for b in range(num_bones):
+        rec = blob.tell()
+        if previous is not None:
+            blob.put(previous + 2, '=h', rec - previous)
+        previous = rec
+        kind = (anim + b) % 4
+        if kind == 0:  # raw quat48 rotation, raw half float position
+            blob.pack('=BBh', b, 0x01 | 0x02, 0)
+            # components within +-0.5 so that w stays real
+            value = (rng.randrange(16384, 49152) | rng.randrange(16384, 49152) << 16
+                     | rng.randrange(8192, 24576) << 32 | rng.getrandbits(1) << 47)
+            blob.write(value.to_bytes(6, 'little'))
+            blob.pack('=3e', *[rng.uniform(-3, 3) for _ in range(3)])
+        elif kind == 1:  # raw quat64 rotation
+            blob.pack('=BBh', b, 0x20, 0)
+            value = 0
+            for k in range(3):
+                value |= (rng.randrange(1 << 20) | 1 << 19) << (21 * k)
+            blob.write(value.to_bytes(8, 'little'))
+        else:  # rle rotation, and position for every other bone
+            tracks = ('rot', 'pos') if kind == 2 else ('rot',)
+            blob.pack('=BBh', b, 0x08 | (0x04 if kind == 2 else 0), 0)
+            pointers = [blob.reserve(6) for _ in tracks]
+            for pointer in pointers:
+                offsets = []
+                for k in range(3):
+                    values = nprng.integers(-3000, 3000, count, dtype=np.int16)
+                    offsets.append(blob.write(_rle(values, rng)) - pointer if count else 0)
+                blob.put(pointer, '=hhh', *offsets)
+        blob.align(2)
+
+
+def generate(
+    seed: int = 0,
+    num_bones: int = 8,
+    num_models: int = 2,
+    meshes_per_model: int = 2,
+    verts_per_mesh: int = 30,
+    strip_groups_per_mesh: int = 1,
+    num_lods: int = 1,
+    num_anims: int = 2,
+    num_frames: int = 12,
+    section_frames: int = 0,
+    num_seqs: int = 3,
+    num_textures: int = 2,
+    num_skins: int = 2,
+    anim_block_size: int = 0,
+    num_flexes: int = 0,
+    reduce_lods: bool = False,
+    name: str = 'synthetic/model.mdl',
+) -> SyntheticModel:
+    # every anim desc cycles through raw quat48 + raw pos, raw quat64, rle rot + pos and
+    # rle rot only tracks per bone. section_frames > 0 splits animations into sections.
+    # anim_block_size > 0 moves every section but the first into an .ani file, starting a new
+    # block whenever the current one holds at least that many bytes.
+    # num_flexes > 0 adds that many flex controllers, each driving one flex of every mesh which
+    # moves a tenth of its vertices, blended with the next flex by a random side
+    # lods > 0 are described by vvd fixups, every lod draws the same triangles unless reduce_lods,
+    # where every lod keeps the first half of the vertices of every mesh of the lod before it
+    if verts_per_mesh < 3 * strip_groups_per_mesh:
+        raise ValueError('every strip group needs at least 3 vertices')
+    lod_counts = [
+        max(verts_per_mesh >> lod, 3 * strip_groups_per_mesh) if reduce_lods else verts_per_mesh
+        for lod in range(num_lods)
+    ]
+    rng = random.Random(seed)
+    nprng = np.random.default_rng(seed)
+    checksum = rng.getrandbits(32)
+
+    m = _Blob()
+    m.reserve(408)
+    strings: List[Tuple[int, int, str]] = []  # (record, field offset, text)
+
+    # mstudiobone_t
+    bone_off = m.tell()
+    worlds: List[np.ndarray] = []
+    for i in range(num_bones):
+        parent = -1 if i == 0 else rng.randrange(i)
+        pos = [rng.uniform(-5, 5) for _ in range(3)]
+        rot = [rng.uniform(-1, 1) for _ in range(3)]
+        quat = _angle_quaternion(rot)
+        world = _matrix(quat, pos)
+        if parent >= 0:
+            world = worlds[parent] @ world
+        worlds.append(world)
+        pose_to_bone = np.linalg.inv(world)[:3]
+        rec = m.tell()
+        m.pack('=ii6i', 0, parent, *([-1] * 6))
+        m.pack('=3f4f3f', *pos, *quat, *rot)
+        m.pack('=3f', *[rng.uniform(0.001, 0.01) for _ in range(3)])
+        m.pack('=3f', *[rng.uniform(0.0001, 0.001) for _ in range(3)])
+        m.pack('=12f', *pose_to_bone.ravel())
+        m.pack('=4f', 0, 0, 0, 1)
+        m.pack('=6i', 0x100, 0, 0, i, 0, 1)
+        m.reserve(32)
+        strings.append((rec, 0, 'bone%d' % i))
+
+    # the .ani file starts with a copy of the mdl header (id IDAG), blocks follow
+    ani = _Blob()
+    ani.reserve(408)
+    blocks: List[Tuple[int, int]] = [(0, 0)]  # block 0 stands for the mdl itself
+
+    # mstudioanimdesc_t
+    desc_off = m.tell()
+    descs = [m.reserve(100) for _ in range(num_anims)]
+    for a, desc in enumerate(descs):
+        strings.append((desc, 4, 'anim%d' % a))
+        m.put(desc, '=iifiiii', -desc, 0, 30.0, 0, num_frames, 0, 0)
+        m.put(desc + 52, '=iiiiiiiiihhif', 0, 0, 0, 0, 0, 0, 0, 0, section_frames, 0, 0, 0, 0.0)
+        spans = _section_spans(num_frames, section_frames)
+        m.align()
+        if section_frames:
+            section_table = m.reserve(8 * len(spans))
+            m.put(desc + 80, '=i', section_table - desc)
+        for s, (first, count) in enumerate(spans):
+            if anim_block_size and section_frames and s > 0:
+                if len(blocks) == 1 or ani.tell() - blocks[-1][0] >= anim_block_size:
+                    ani.align()
+                    blocks.append((ani.tell(), ani.tell()))
+                ani.align()
+                m.put(section_table + 8 * s, '=ii', len(blocks) - 1, ani.tell() - blocks[-1][0])
+                _write_anim(ani, rng, nprng, a, num_bones, count)
+                blocks[-1] = (blocks[-1][0], ani.tell())
+                continue
+            m.align()
+            start = m.tell()
+            if section_frames:
+                m.put(section_table + 8 * s, '=ii', 0, start - desc)
+            if s == 0:
+                m.put(desc + 56, '=i', start - desc)
+            _write_anim(m, rng, nprng, a, num_bones, count)
+
+    # mstudioseqdesc_t, records first since their anim index tables follow them
+    seq_off = m.tell()
+    seqs = [m.reserve(212) for _ in range(num_seqs)]
+    for s, rec in enumerate(seqs):
+        m.put(rec, '=i', -rec)
+        strings.append((rec, 4, 'seq%d' % s))
+        strings.append((rec, 8, 'ACT_RUN' if s % 2 else 'ACT_IDLE'))
+        m.put(rec + 12, '=iiiii', 0, s, 1, 0, 0)
+        m.put(rec + 56, '=iii', 1, m.pack('=hh', s % max(num_anims, 1), 0) - rec, 0)
+        m.put(rec + 68, '=ii', 2, 1)
+
+    # mstudiotexture_t and the skin table
+    tex_off = m.tell()
+    for t in range(num_textures):
+        strings.append((m.reserve(64), 0, 'material/tex%d' % t))
+    skin_off = m.tell()
+    for f in range(num_skins):
+        for t in range(num_textures):
+            m.pack('=h', (t + f) % num_textures)
+    m.align()
+
+    # mstudiobodyparts_t, mstudiomodel_t, mstudiomesh_t
+    body_off = m.reserve(16)
+    strings.append((body_off, 0, 'body'))
+    models = m.reserve(148 * num_models)
+    m.put(body_off, '=iiii', 0, num_models, 1, models - body_off)
+    num_vertices = meshes_per_model * verts_per_mesh
+    for mi in range(num_models):
+        rec = models + 148 * mi
+        base = mi * num_vertices
+        struct.pack_into('64s', m.data, rec, ('model%d' % mi).encode())
+        meshes = m.reserve(116 * meshes_per_model)
+        m.put(rec + 64, '=ifiiiii', 0, 10.0, meshes_per_model, meshes - rec, num_vertices, base * 48, base * 16)
+        for me in range(meshes_per_model):
+            mesh = meshes + 116 * me
+            m.put(mesh, '=iiiiiiiii', me % num_textures, rec - mesh, verts_per_mesh, me * verts_per_mesh,
+                  0, 0, 0, 0, me)
+            m.put(mesh + 52, '=8i', *(lod_counts + [0] * (8 - num_lods)))
+        for me in range(meshes_per_model if num_flexes else 0):
+            # mstudioflex_t, then the mstudiovertanim_t of every flex
+            mesh = meshes + 116 * me
+            flexes = m.reserve(60 * num_flexes)
+            m.put(mesh + 16, '=ii', num_flexes, flexes - mesh)
+            for f in range(num_flexes):
+                ids = np.sort(nprng.choice(verts_per_mesh, max(verts_per_mesh // 10, 1), replace=False))
+                anims = np.zeros(len(ids), [
+                    ('index', '<u2'), ('speed', 'u1'), ('side', 'u1'), ('delta', '<f2', (3,)), ('ndelta', '<f2', (3,)),
+                ])
+                anims['index'] = ids
+                anims['speed'] = 255
+                # every flex is paired with the next one as its other side
+                anims['side'] = nprng.integers(0, 256, len(ids))
+                anims['delta'] = nprng.uniform(-1, 1, (len(ids), 3))
+                anims['ndelta'] = nprng.uniform(-0.1, 0.1, (len(ids), 3))
+                flex = flexes + 60 * f
+                m.put(flex, '=i4fiiiB', f, 0.0, 1.0, 1.0, 2.0, len(ids), m.write(anims.tobytes()) - flex,
+                      (f + 1) % num_flexes, 0)
+                m.align()
+
+    # mstudioflexdesc_t, mstudioflexcontroller_t and mstudioflexrule_t, every flex desc is
+    # its controller times one
+    flex_desc_off = m.tell()
+    for f in range(num_flexes):
+        strings.append((m.reserve(4), 0, 'flex%d' % f))
+    flex_controller_off = m.tell()
+    for f in range(num_flexes):
+        rec = m.reserve(20)
+        m.put(rec + 8, '=iff', f, 0.0, 1.0)
+        strings.append((rec, 0, 'default'))
+        strings.append((rec, 4, 'controller%d' % f))
+    flex_rule_off = m.tell()
+    rules = [m.reserve(12) for _ in range(num_flexes)]
+    for f, rec in enumerate(rules):
+        m.put(rec, '=iii', f, 3, m.pack('=iiifii', 2, f, 1, 1.0, 6, 0) - rec)
+
+    anim_block_table = 0
+    if len(blocks) > 1:
+        anim_block_table = m.tell()
+        for block in blocks:
+            m.pack('=ii', *block)
+        anim_block_name = m.write(os.path.splitext(name)[0].encode() + b'.ani\0')
+    else:
+        anim_block_name = m.write(b'\0')
+    for rec, field, text in strings:
+        m.put(rec + field, '=i', m.write(text.encode() + b'\0') - rec)
+    m.align()
+
+    m.put(0, '=III64si', 0x54534449, 48, checksum, name.encode(), m.tell())
+    m.put(156, '=ii', num_bones, bone_off)
+    m.put(180, '=ii', num_anims, desc_off)
+    m.put(188, '=ii', num_seqs, seq_off)
+    m.put(204, '=ii', num_textures, tex_off)
+    m.put(220, '=iii', num_textures, num_skins, skin_off)
+    m.put(232, '=ii', 1, body_off)
+    if num_flexes:
+        m.put(260, '=iiiiii', num_flexes, flex_desc_off, num_flexes, flex_controller_off, num_flexes, flex_rule_off)
+    m.put(348, '=iii', anim_block_name, len(blocks) if len(blocks) > 1 else 0, anim_block_table)
+    ani.put(0, '=III64si', 0x47414449, 48, checksum, name.encode(), ani.tell())
+
+    return SyntheticModel(
+        bytes(m.data),
+        _generate_vvd(nprng, checksum, num_models * meshes_per_model, lod_counts, num_bones, reduce_lods),
+        _generate_vtx(checksum, num_models, meshes_per_model, lod_counts, strip_groups_per_mesh),
+        bytes(ani.data) if len(blocks) > 1 else None,
+    )
+
+
+def _generate_vvd(
+    rng: np.random.Generator, checksum: int, num_meshes: int, lod_counts: List[int], num_bones: int, reduce_lods: bool,
+) -> bytes:
+    num_lods = len(lod_counts)
+    num_vertices = num_meshes * lod_counts[0]
+    vertices = np.zeros(num_vertices, np.dtype([
+        ('weight', '<f4', (3,)), ('bone', 'u1', (3,)), ('numbones', 'u1'),
+        ('position', '<f4', (3,)), ('normal', '<f4', (3,)), ('tex_coord', '<f4', (2,)),
+    ]))
+    numbones = rng.integers(1, 4, num_vertices)
+    weights = rng.random((num_vertices, 3)) * (np.arange(3) < numbones[:, None])
+    vertices['weight'] = weights / weights.sum(axis=1, keepdims=True)
+    vertices['bone'] = rng.integers(0, num_bones, (num_vertices, 3)) * (np.arange(3) < numbones[:, None])
+    vertices['numbones'] = numbones
+    vertices['position'] = rng.uniform(-10, 10, (num_vertices, 3))
+    normals = rng.normal(size=(num_vertices, 3))
+    vertices['normal'] = normals / np.linalg.norm(normals, axis=1, keepdims=True)
+    vertices['tex_coord'] = rng.random((num_vertices, 2))
+    tangents = np.zeros((num_vertices, 4), '<f4')
+    tangents[:, 0] = 1
+    tangents[:, 3] = np.where(np.arange(num_vertices) % 2, 1, -1)
+
+    # lods past the first are stored as three shuffled fixup ranges covering every vertex, or
+    # with reduce_lods one range per mesh and lod, of the vertices dropped after that lod. the
+    # ranges of a mesh keep its vertices of a lod in front, and are stored in reverse order
+    fixups = []
+    if num_lods > 1 and reduce_lods:
+        counts = lod_counts + [0]
+        ranges = [(lod, counts[lod] - counts[lod + 1]) for lod in reversed(range(num_lods))] * num_meshes
+        ranges = [(lod, count) for (lod, count) in ranges if count]
+        sources = num_vertices - np.cumsum([count for (_, count) in ranges])
+        fixups = [(lod, int(source), count) for ((lod, count), source) in zip(ranges, sources)]
+    elif num_lods > 1:
+        third = num_vertices // 3
+        fixups = [(num_lods - 1, third, third), (num_lods - 1, 0, third),
+                  (num_lods - 1, 2 * third, num_vertices - 2 * third)]
+    fixup_table = b''.join(struct.pack('=iii', *fixup) for fixup in fixups)
+    vertex_start = 64 + len(fixup_table)
+    tangent_start = vertex_start + vertices.nbytes
+    header = struct.pack(
+        '=IIIi8iiiii', 0x56534449, 4, checksum, num_lods,
+        *([num_meshes * count for count in lod_counts] + [0] * (8 - num_lods)),
+        len(fixups), 64 if fixups else 0, vertex_start, tangent_start,
+    )
+    return header + fixup_table + vertices.tobytes() + tangents.tobytes()
+
+
+def _generate_vtx(
+    checksum: int, num_models: int, meshes_per_model: int, lod_counts: List[int], strip_groups: int,
+) -> bytes:
+    vertex_dtype = np.dtype([
+        ('bone_weight_index', 'u1', (3,)), ('num_bones', 'u1'), ('orig_mesh_vert_id', '<u2'), ('bone_id', 'i1', (3,)),
+    ])
+    # vertices of a mesh are split evenly over its strip groups, each drawn as one triangle list
+    num_lods = len(lod_counts)
+
+    x = _Blob()
+    x.reserve(36)
+    body_part = x.reserve(8)
+    x.put(0, '=IiHHiIiiii', 7, 24, 53, 9, 3, checksum, num_lods, 0, 1, body_part)
+    models = x.reserve(8 * num_models)
+    x.put(body_part, '=ii', num_models, models - body_part)
+    for mi in range(num_models):
+        model = models + 8 * mi
+        lods = x.reserve(12 * num_lods)
+        x.put(model, '=ii', num_lods, lods - model)
+        for lod in range(num_lods):
+            model_lod = lods + 12 * lod
+            meshes = x.reserve(9 * meshes_per_model)
+            x.put(model_lod, '=iif', meshes_per_model, meshes - model_lod, float(lod * 10))
+            bounds = np.linspace(0, lod_counts[lod], strip_groups + 1).astype(int)
+            for me in range(meshes_per_model):
+                mesh = meshes + 9 * me
+                groups = x.reserve(25 * strip_groups)
+                x.put(mesh, '=iiB', strip_groups, groups - mesh, 0)
+                for g in range(strip_groups):
+                    group = groups + 25 * g
+                    first, count = int(bounds[g]), int(bounds[g + 1] - bounds[g])
+                    vertices = np.zeros(count, vertex_dtype)
+                    vertices['bone_weight_index'] = (0, 1, 2)
+                    vertices['num_bones'] = 1
+                    vertices['orig_mesh_vert_id'] = first + np.roll(np.arange(count), (mi + me + g) % count)
+                    vertices['bone_id'] = (0, -1, -1)
+                    indices = (np.arange(count - 2)[:, None] + np.arange(3)).astype('<u2').ravel()
+                    vertex_off = x.write(vertices.tobytes())
+                    index_off = x.write(indices.tobytes())
+                    strip_off = x.pack('=iiiihBii', len(indices), 0, count, 0, 3, 1, 0, 0)
+                    x.put(group, '=iiiiiiB', count, vertex_off - group, len(indices), index_off - group,
+                          1, strip_off - group, 0)
+    return bytes(x.data)
@@ -1,6 +1,24 @@
-from .vvd import VVD
-from .vtx import VTX
-from .mdl import MDL, MDLBone, MDLAnim
+from .vvd import VVD, VVD_VERTEX_DTYPE, VVD_TANGENT_DTYPE, VVD_FIXUP_DTYPE, VVDHeader, probe_vvd
+from .vtx import VTX, VTX_VERTEX_DTYPE, VTX_STRIP_DTYPE, VTX_INDEX_DTYPE, VTXHeader, probe_vtx
+from .ani import ANI
+from .mdl import MDL, MDLBone, MDLBoneTable, MDL_BONE_DTYPE, MDLAnim, MDLHeader, probe_mdl
+from .mdl import MDLFlex, MDL_VERTANIM_DTYPE, MDL_VERTANIM_WRINKLE_DTYPE
 from .mdl_enum import MDLFlag, MDLAnimDescFlag, MDLAnimFlag
+from .instrument import Instrument, TableStats
+from .aio import AsyncLoader
+from .bundle import ModelBundle
+from .cache import ModelCache
+from .mesh import DrawBatch, assemble
+from .pose import Skeleton
+from .skinning import skin
+from .flex import Morph
 
-__all__ = ['VVD', 'VTX', 'MDL', 'MDLBone', 'MDLFlag', 'MDLAnim', 'MDLAnimDescFlag', 'MDLAnimFlag']
+__all__ = [
+    'VVD', 'VVD_VERTEX_DTYPE', 'VVD_TANGENT_DTYPE', 'VVD_FIXUP_DTYPE', 'VVDHeader', 'probe_vvd',
+    'VTX', 'VTX_VERTEX_DTYPE', 'VTX_STRIP_DTYPE', 'VTX_INDEX_DTYPE', 'VTXHeader', 'probe_vtx',
+    'ANI', 'MDL', 'MDLBone', 'MDLBoneTable', 'MDL_BONE_DTYPE', 'MDLHeader', 'probe_mdl',
+    'MDLFlag', 'MDLAnim', 'MDLAnimDescFlag', 'MDLAnimFlag',
+    'MDLFlex', 'MDL_VERTANIM_DTYPE', 'MDL_VERTANIM_WRINKLE_DTYPE',
+    'Instrument', 'TableStats', 'ModelBundle', 'AsyncLoader', 'ModelCache', 'DrawBatch', 'assemble', 'Skeleton', 'skin',
+    'Morph',
+]
@@ -0,0 +1,82 @@
+import asyncio
+import os
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from .bundle import ModelBundle, find_siblings
+from .mdl import MDL
+
+
+def _read_file(path: Optional[str]) -> Optional[bytes]:
+    if path is None:
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _read_bundle(path: str) -> Tuple[bytes, Optional[bytes], Optional[bytes]]:
+    (vvd_path, vtx_path) = find_siblings(path)
+    return (_read_file(path), _read_file(vvd_path), _read_file(vtx_path))
+
+
+def _decode_bundle(path: str, sources: Tuple[bytes, Optional[bytes], Optional[bytes]], lazy: bool) -> ModelBundle:
+    return ModelBundle(path, lazy=lazy, sources=sources)
+
+
+def _decode_mdl(data: bytes, lazy: bool) -> MDL:
+    return MDL(data, lazy=lazy)
+
+
+class AsyncLoader:
+    # loads models from inside an event loop without blocking it.
+    # files are read on the loop's default executor (threads), decoding runs on `executor`:
+    # None for the default one as well, or e.g. a ProcessPoolExecutor to keep the parsing off
+    # the GIL, in which case the result is pickled back. loads of the same file that overlap
+    # share one read and one decode
+
+    executor: Optional[Executor]
+    lazy: bool
+
+    def __init__(self, executor: Optional[Executor] = None, lazy: bool = False):
+        self.executor = executor
+        self.lazy = lazy
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    async def load(self, path: Union[str, os.PathLike]) -> ModelBundle:
+        path = os.path.abspath(path)
+        return await self._shared(('bundle', path), self._load_bundle, path)
+
+    async def load_mdl(self, path: Union[str, os.PathLike]) -> MDL:
+        path = os.path.abspath(path)
+        return await self._shared(('mdl', path), self._load_mdl, path)
+
+    async def _load_bundle(self, path: str) -> ModelBundle:
+        loop = asyncio.get_running_loop()
+        sources = await loop.run_in_executor(None, _read_bundle, path)
+        return await loop.run_in_executor(self.executor, _decode_bundle, path, sources, self.lazy)
+
+    async def _load_mdl(self, path: str) -> MDL:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, _read_file, path)
+        return await loop.run_in_executor(self.executor, _decode_mdl, data, self.lazy)
+
+    async def _shared(self, key: Hashable, func: Callable[[str], Any], path: str) -> Any:
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(path))
+            self._pending[key] = task
+
+            def forget(_):
+                if self._pending.get(key) is task:
+                    del self._pending[key]
+            task.add_done_callback(forget)
+        # a caller that gets cancelled must not cancel the load the others are waiting for
+        return await asyncio.shield(task)
+
+
+async def load_bundle(
+    path: Union[str, os.PathLike],
+    executor: Optional[Executor] = None,
+    lazy: bool = False,
+) -> ModelBundle:
+    return await AsyncLoader(executor, lazy).load(path)
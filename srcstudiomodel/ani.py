@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+from .instrument import Instrument, measure
+from .type import Source
+from .util import Layout, Reader
+
+
+class ANIHeader(NamedTuple):
+    id: int
+    version: int
+    checksum: int
+
+
+# .ani files start with a copy of the studiohdr_t of their mdl, with id IDAG
+_ani_header = Layout(('id', 'I'), ('version', 'i'), ('checksum', 'I'))
+
+
+def _unpack_header(buf: Reader) -> ANIHeader:
+    header = ANIHeader(*_ani_header.unpack(buf, 0))
+    if header.id != 0x47414449:
+        raise Exception('this is not ani file.')
+    return header
+
+
+# guards the bookkeeping of the block caches, never held while reading
+_block_lock = threading.Lock()
+
+
+class ANI:
+    # the animation blocks (MDL.anim_blocks) of a model, kept outside the mdl. a path is memory
+    # mapped and a block is only copied out of the mapping when an animation in it is decoded;
+    # the most recently used blocks are kept
+    path: Optional[str]
+    version: int
+    checksum: int
+    # (data_start, data_end) of every block, block 0 stands for the mdl itself
+    block_ranges: List[Tuple[int, int]]
+
+    block_cache_size: int = 16
+
+    _buf: Reader
+    _instrument: Optional[Instrument]
+    _blocks: 'OrderedDict[int, Reader]'
+
+    def __init__(
+        self,
+        src: Source,
+        block_ranges: List[Tuple[int, int]],
+        checksum: Optional[int] = None,
+        instrument: Optional[Instrument] = None,
+    ):
+        self.path = os.fspath(src) if isinstance(src, (str, os.PathLike)) else None
+        self._buf = Reader(src) if instrument is None else instrument.reader(src)
+        self._instrument = instrument
+        with measure(instrument, 'ani', 'header', self._buf):
+            header = _unpack_header(self._buf)
+        if checksum is not None and header.checksum != checksum:
+            raise Exception('checksum of ani does not match mdl.')
+        (self.version, self.checksum) = (header.version, header.checksum)
+        self.block_ranges = block_ranges
+        self._blocks = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.block_ranges)
+
+    def block(self, index: int) -> Reader:
+        blocks = self._blocks
+        with _block_lock:
+            buf = blocks.get(index)
+            if buf is not None:
+                blocks.move_to_end(index)
+                return buf
+        if not 0 < index < len(self.block_ranges):
+            raise Exception('animation block out of range')
+        (start, end) = self.block_ranges[index]
+        if not 0 < start <= end <= len(self._buf.data):
+            raise Exception('broken animation block')
+        with measure(self._instrument, 'ani', 'block', self._buf):
+            data = self._buf.read(start, end - start)
+        buf = Reader(data) if self._instrument is None else self._instrument.reader(data)
+        with _block_lock:
+            blocks[index] = buf
+            if len(blocks) > self.block_cache_size:
+                blocks.popitem(last=False)
+        return buf
+
+    def __reduce__(self):
+        # a mapping can not be pickled, so a file is opened again and anything else is copied
+        src = self.path if self.path is not None else self._buf.read(0, len(self._buf.data))
+        return (ANI, (src, self.block_ranges, self.checksum))
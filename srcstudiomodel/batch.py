@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .bundle import ModelBundle
+
+
+class BatchResult:
+    path: str
+    value: Any
+    # "ExceptionType: message" when loading the file failed
+    error: Optional[str]
+
+    def __init__(self, path: str, value: Any = None, error: Optional[str] = None):
+        self.path = path
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def find_models(root: Union[str, os.PathLike]) -> Iterator[str]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith('.mdl'):
+                yield os.path.join(dirpath, filename)
+
+
+def summarize(bundle: ModelBundle) -> Dict[str, Any]:
+    mdl = bundle.mdl
+    return {
+        'name': mdl.name,
+        'version': mdl.version,
+        'checksum': mdl.checksum,
+        'flags': int(mdl.flags),
+        'num_bones': len(mdl.bone_table),
+        'num_anim_descs': len(mdl.anim_descs),
+        'num_seq_descs': len(mdl.seq_descs),
+        'num_bodyparts': len(mdl.bodyparts),
+        'textures': [texture.name for texture in mdl.textures],
+        'num_lods': bundle.vvd.num_lods if bundle.vvd else 0,
+        'num_vertices': len(bundle.vvd.vertex_array) if bundle.vvd else 0,
+    }
+
+
+def _load(path: str, func: Callable[[Any], Any], lazy: bool, loader: Callable[..., Any]) -> BatchResult:
+    try:
+        return BatchResult(path, func(loader(path, lazy=lazy)))
+    except Exception as e:
+        return BatchResult(path, error='%s: %s' % (type(e).__name__, e))
+
+
+def _load_chunk(
+    paths: List[str], func: Callable[[Any], Any], lazy: bool, loader: Callable[..., Any],
+) -> List[BatchResult]:
+    return [_load(path, func, lazy, loader) for path in paths]
+
+
+def load_batch(
+    paths: Union[str, os.PathLike, Iterable[str]],
+    func: Callable[[Any], Any] = summarize,
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+    lazy: bool = True,
+    progress: Optional[Callable[[int, int, BatchResult], None]] = None,
+    loader: Callable[..., Any] = ModelBundle,
+) -> Iterator[BatchResult]:
+    # loads every bundle in a process pool and yields a result of `func` per file
+    # as soon as its chunk finishes. `paths` is a directory to walk or a list of .mdl.
+    # `loader(path, lazy=lazy)` opens a file, e.g. MDL when the .vvd and .vtx are not needed.
+    # `func` and `loader` must be picklable, e.g. module level functions or classes.
+    if isinstance(paths, (str, os.PathLike)):
+        paths = find_models(paths)
+    paths = list(paths)
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+    total = len(paths)
+    done = 0
+
+    def finish(results: List[BatchResult]) -> Iterator[BatchResult]:
+        nonlocal done
+        for result in results:
+            done += 1
+            if progress is not None:
+                progress(done, total, result)
+            yield result
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            yield from finish(_load_chunk(chunk, func, lazy, loader))
+        return
+
+    # a worker that dies breaks the whole pool and fails every chunk in flight. those are run
+    # again one file per task, and files in flight when that breaks the pool again are run
+    # alone, where a dead worker fails only the file which killed it
+    queue = deque((chunk, 0) for chunk in chunks)
+    executor = ProcessPoolExecutor(workers)
+    try:
+        # keep a few chunks per worker in flight, so results stream back while the rest wait
+        pending: Dict[Future, Tuple[List[str], int]] = {}
+        broken = False
+        while queue or pending:
+            while queue and not broken and len(pending) < workers * 2:
+                (chunk, attempt) = queue[0]
+                if (attempt == 2 and pending) or any(running == 2 for (_, running) in pending.values()):
+                    break
+                try:
+                    future = executor.submit(_load_chunk, chunk, func, lazy, loader)
+                except BrokenProcessPool:
+                    broken = True
+                    break
+                pending[future] = queue.popleft()
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                (chunk, attempt) = pending.pop(future)
+                try:
+                    results = future.result()
+                except BrokenProcessPool as e:
+                    broken = True
+                    if attempt < 2:
+                        queue.extend(([path], attempt + 1) for path in chunk)
+                        continue
+                    results = [BatchResult(path, error='%s: %s' % (type(e).__name__, e)) for path in chunk]
+                except Exception as e:  # e.g. a result which can not be pickled
+                    results = [BatchResult(path, error='%s: %s' % (type(e).__name__, e)) for path in chunk]
+                yield from finish(results)
+            if broken and not pending:
+                executor.shutdown()
+                executor = ProcessPoolExecutor(workers)
+                broken = False
+    finally:
+        executor.shutdown()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m srcstudiomodel.batch',
+        description='load every model under the directories and print a summary per model as json lines',
+    )
+    parser.add_argument('roots', nargs='+', help='directories or .mdl files')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    parser.add_argument('--chunksize', type=int, default=16, help='models per task')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report progress')
+    args = parser.parse_args(argv)
+
+    paths: List[str] = []
+    for root in args.roots:
+        paths.extend([root] if os.path.isfile(root) else find_models(root))
+
+    def report(done: int, total: int, result: BatchResult):
+        if not args.quiet:
+            print('\r%d/%d' % (done, total), end='' if done < total else '\n', file=sys.stderr)
+
+    failed = 0
+    for result in load_batch(paths, workers=args.jobs, chunksize=args.chunksize, progress=report):
+        if result.ok:
+            print(json.dumps({'path': result.path, **result.value}))
+        else:
+            failed += 1
+            print(json.dumps({'path': result.path, 'error': result.error}))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import Executor
+from typing import Iterable, Optional, Tuple, Union
+
+from .instrument import Instrument
+from .mdl import MDL, MDLBodyPart, MDLHeader, MDLModel, probe_mdl
+from .type import Source
+from .util import Reader
+from .vtx import VTX, probe_vtx
+from .vvd import VVD, probe_vvd
+
+# the first one found is used
+_VTX_SUFFIXES = ('.dx90.vtx', '.dx80.vtx', '.sw.vtx', '.vtx')
+
+
+def _find_sibling(base: str, *suffixes: str) -> Optional[str]:
+    for suffix in suffixes:
+        if os.path.isfile(base + suffix):
+            return base + suffix
+    return None
+
+
+def find_siblings(path: Union[str, os.PathLike]) -> Tuple[Optional[str], Optional[str]]:
+    # the vvd and vtx files that belong to the mdl at `path`
+    base = os.path.splitext(os.fspath(path))[0]
+    return (_find_sibling(base, '.vvd'), _find_sibling(base, *_VTX_SUFFIXES))
+
+
+def _num_model_vertexes(buf: Reader, header: MDLHeader) -> int:
+    # lod 0 vertex count of every model, from the bodypart and model records alone
+    field = MDLModel._layout.names.index('num_vertices')
+    total = 0
+    for i, (_, num_models, _, model_index) in enumerate(
+            MDLBodyPart._layout.iter_unpack(buf, header.bodypart_index, header.num_bodyparts)):
+        offset = header.bodypart_index + i * MDLBodyPart._size + model_index
+        total += sum(values[field] for values in MDLModel._layout.iter_unpack(buf, offset, num_models))
+    return total
+
+
+class ModelBundle:
+    mdl_path: str
+    vvd_path: Optional[str]
+    vtx_path: Optional[str]
+    # animation blocks, only used when the mdl has any
+    ani_path: Optional[str]
+
+    mdl: MDL
+    # models without meshes (e.g. animation only ones) have neither
+    vvd: Optional[VVD]
+    vtx: Optional[VTX]
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        lazy: bool = False,
+        sources: Optional[Tuple[Source, Optional[Source], Optional[Source]]] = None,
+        instrument: Optional[Instrument] = None,
+        lods: Optional[Iterable[int]] = None,
+        executor: Optional[Executor] = None,
+    ):
+        # `sources` are the already read contents of mdl_path, vvd_path and vtx_path,
+        # used instead of opening the files again. `instrument` is handed to all three parsers,
+        # `lods` selects the lods which vvd and vtx load (default: all). with `executor` the vvd,
+        # the vtx and the tables of the mdl are parsed on it at the same time
+        self.mdl_path = os.fspath(path)
+        (self.vvd_path, self.vtx_path) = find_siblings(self.mdl_path)
+        self.ani_path = _find_sibling(os.path.splitext(self.mdl_path)[0], '.ani')
+        if sources is None:
+            sources = (self.mdl_path, self.vvd_path, self.vtx_path)
+
+        mdl_buf = Reader(sources[0])
+        vvd_buf = Reader(sources[1]) if sources[1] is not None else None
+        vtx_buf = Reader(sources[2]) if sources[2] is not None else None
+        self._validate_headers(mdl_buf, vvd_buf, vtx_buf)
+
+        self.mdl = MDL(mdl_buf, lazy=True, instrument=instrument, ani=self.ani_path)
+        if lods is not None:
+            lods = tuple(lods)
+        if executor is None:
+            if not lazy:
+                self.mdl.load()
+            self.vvd = VVD(vvd_buf, instrument, lods) if vvd_buf is not None else None
+            self.vtx = VTX(vtx_buf, instrument, lods) if vtx_buf is not None else None
+        else:
+            vvd = executor.submit(VVD, vvd_buf, instrument, lods) if vvd_buf is not None else None
+            vtx = executor.submit(VTX, vtx_buf, instrument, lods) if vtx_buf is not None else None
+            if not lazy:
+                self.mdl.load(executor)
+            self.vvd = vvd.result() if vvd is not None else None
+            self.vtx = vtx.result() if vtx is not None else None
+
+    def _validate_headers(self, mdl_buf: Reader, vvd_buf: Optional[Reader], vtx_buf: Optional[Reader]):
+        try:
+            mdl = probe_mdl(mdl_buf)
+        except Exception:
+            raise Exception('this is not mdl file: %s' % self.mdl_path)
+        if (vvd_buf is None) != (vtx_buf is None):
+            raise Exception('vvd or vtx is missing: %s' % self.mdl_path)
+        if vvd_buf is None or vtx_buf is None:
+            return
+        try:
+            vvd = probe_vvd(vvd_buf)
+        except Exception:
+            raise Exception('this is not vvd file: %s' % self.vvd_path)
+        try:
+            vtx = probe_vtx(vtx_buf)
+        except Exception:
+            raise Exception('this is not vtx file: %s' % self.vtx_path)
+        if vvd.checksum != mdl.checksum:
+            raise Exception('checksum of vvd does not match mdl: %s' % self.vvd_path)
+        if vtx.checksum != mdl.checksum:
+            raise Exception('checksum of vtx does not match mdl: %s' % self.vtx_path)
+        if vvd.num_lods != vtx.num_lods:
+            raise Exception('lod count of vvd and vtx does not match: %s' % self.mdl_path)
+        if _num_model_vertexes(mdl_buf, mdl) != vvd.num_lod_vertexes[0]:
+            raise Exception('vertex count of vvd does not match mdl: %s' % self.vvd_path)
+
+    @property
+    def checksum(self) -> int:
+        return self.mdl.checksum
+
+    def __str__(self) -> str:
+        return self.mdl.name
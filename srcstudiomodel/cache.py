@@ -0,0 +1,230 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+from numpy.lib import format as npformat
+
+from .bundle import ModelBundle
+from .mdl import probe_mdl
+from .mesh import assemble
+from .pose import Skeleton
+
+# file layout: magic, format version, json size, json header, then array blobs.
+# every blob starts at a multiple of _ALIGN so memory mapped arrays stay aligned
+_MAGIC = b'SSMCACHE'
+_VERSION = 2
+_HEADER = struct.Struct('=8sII')
+_ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_cache_file(path: str, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    entries = []
+    offset = 0
+    for name, array in arrays.items():
+        entries.append({
+            'name': name,
+            'dtype': npformat.dtype_to_descr(array.dtype),
+            'shape': list(array.shape),
+            'offset': offset,
+        })
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({'meta': meta, 'arrays': entries}).encode()
+    base = _aligned(_HEADER.size + len(header))
+
+    # write next to the target and rename, so that readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(header)))
+            f.write(header)
+            for entry, array in zip(entries, arrays.values()):
+                f.seek(base + entry['offset'])
+                f.write(array.tobytes())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_cache_file(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    (magic, version, size) = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise Exception('this is not model cache file')
+    header = json.loads(data[_HEADER.size:_HEADER.size + size])
+    base = _aligned(_HEADER.size + size)
+    arrays = {}
+    for entry in header['arrays']:
+        dtype = npformat.descr_to_dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays[entry['name']] = np.empty(shape, dtype)
+        else:
+            arrays[entry['name']] = np.frombuffer(data, dtype, count, base + entry['offset']).reshape(shape)
+    return header['meta'], arrays
+
+
+class CachedBatch:
+    material: str
+    vertex_ids: np.ndarray
+    vertices: np.ndarray
+    tangents: np.ndarray
+    indices: np.ndarray
+
+    def __init__(self, material: str, vertex_ids: np.ndarray, vertices: np.ndarray,
+                 tangents: np.ndarray, indices: np.ndarray):
+        self.material = material
+        self.vertex_ids = vertex_ids
+        self.vertices = vertices
+        self.tangents = tangents
+        self.indices = indices
+
+    def __str__(self) -> str:
+        return self.material
+
+
+class CachedModel:
+    meta: Dict[str, Any]
+    arrays: Dict[str, np.ndarray]
+    batches: List[CachedBatch]
+
+    def __init__(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.meta = meta
+        self.arrays = arrays
+        self.batches = [
+            CachedBatch(
+                material,
+                arrays['batch%d_vertex_ids' % i],
+                arrays['batch%d_vertices' % i],
+                arrays['batch%d_tangents' % i],
+                arrays['batch%d_indices' % i],
+            )
+            for i, material in enumerate(meta['batches'])
+        ]
+
+    @property
+    def name(self) -> str:
+        return self.meta['name']
+
+    @property
+    def checksum(self) -> int:
+        return self.meta['checksum']
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def _build(bundle: ModelBundle, lod: int, skin: int, body: int) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    mdl = bundle.mdl
+    skeleton = Skeleton(mdl.bone_table)
+    meta: Dict[str, Any] = {
+        'name': mdl.name,
+        'version': mdl.version,
+        'checksum': mdl.checksum,
+        'flags': int(mdl.flags),
+        'bones': mdl.bone_table.names,
+        'textures': [texture.name for texture in mdl.textures],
+        'skins': [[texture.name for texture in family] for family in mdl.skins],
+        'bodyparts': [bodypart.name for bodypart in mdl.bodyparts],
+        'anim_descs': [anim_desc.name for anim_desc in mdl.anim_descs],
+        'seq_descs': [seq_desc.label for seq_desc in mdl.seq_descs],
+        'lod': lod,
+        'skin': skin,
+        'body': body,
+        'batches': [],
+    }
+    arrays = {
+        'bone_parents': skeleton.parents,
+        'bone_pos': skeleton.bind_pos,
+        'bone_quat': skeleton.bind_quat,
+        'pose_to_bone': skeleton.pose_to_bone,
+    }
+    if bundle.vvd is not None and bundle.vtx is not None:
+        for i, batch in enumerate(assemble(mdl, bundle.vtx, bundle.vvd, lod, skin, body)):
+            meta['batches'].append(batch.material.name)
+            arrays['batch%d_vertex_ids' % i] = batch.vertex_ids
+            arrays['batch%d_vertices' % i] = batch.vertices
+            arrays['batch%d_tangents' % i] = batch.tangents
+            arrays['batch%d_indices' % i] = batch.indices
+    return meta, arrays
+
+
+class ModelCache:
+    directory: str
+    max_bytes: int
+
+    def __init__(self, directory: Union[str, os.PathLike], max_bytes: int = 1 << 30):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, path: Union[str, os.PathLike], lod: int = 0, skin: int = 0, body: int = 0) -> str:
+        # header checksum plus size and mtime of the mdl and its sibling files
+        path = os.fspath(path)
+        parts = [_VERSION, probe_mdl(path).checksum, lod, skin, body]
+        base = os.path.splitext(path)[0]
+        for sibling in (path, base + '.vvd', base + '.dx90.vtx', base + '.dx80.vtx', base + '.sw.vtx', base + '.vtx'):
+            try:
+                stat = os.stat(sibling)
+            except FileNotFoundError:
+                continue
+            parts += [os.path.basename(sibling), stat.st_size, stat.st_mtime_ns]
+        return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.cache')
+
+    def load(self, path: Union[str, os.PathLike], lod: int = 0, skin: int = 0, body: int = 0) -> CachedModel:
+        file = self._file(self.key(path, lod, skin, body))
+        try:
+            meta, arrays = read_cache_file(file)
+            model = CachedModel(meta, arrays)
+            os.utime(file)  # mtime is the last use for eviction
+            return model
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # a corrupt or truncated file is dropped and built again
+            try:
+                os.unlink(file)
+            except OSError:
+                pass
+        meta, arrays = _build(ModelBundle(path, lazy=True, lods=[lod]), lod, skin, body)
+        write_cache_file(file, meta, arrays)
+        model = CachedModel(*read_cache_file(file))
+        self.evict()
+        return model
+
+    def evict(self):
+        # drop the least recently used files until the cache fits in max_bytes
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.cache') and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:  # still mapped on some platforms
+                continue
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.cache'):
+                os.unlink(entry.path)
@@ -0,0 +1,272 @@
+import argparse
+import os
+import sqlite3
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .batch import BatchResult, find_models, load_batch
+from .mdl import MDL
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    checksum INTEGER,
+    name TEXT,
+    version INTEGER,
+    flags INTEGER,
+    num_bones INTEGER,
+    num_seq_descs INTEGER,
+    num_bodyparts INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS textures (
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS skins (
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    family INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    texture TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS sequences (
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    label TEXT NOT NULL COLLATE NOCASE,
+    activity_name TEXT NOT NULL COLLATE NOCASE,
+    activity INTEGER NOT NULL,
+    flags INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bones (
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    parent INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bodyparts (
+    model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    num_models INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS models_num_bones ON models(num_bones);
+CREATE INDEX IF NOT EXISTS textures_name ON textures(name);
+CREATE INDEX IF NOT EXISTS textures_model ON textures(model_id);
+CREATE INDEX IF NOT EXISTS skins_model ON skins(model_id);
+CREATE INDEX IF NOT EXISTS sequences_activity ON sequences(activity_name);
+CREATE INDEX IF NOT EXISTS sequences_label ON sequences(label);
+CREATE INDEX IF NOT EXISTS sequences_model ON sequences(model_id);
+CREATE INDEX IF NOT EXISTS bones_name ON bones(name);
+CREATE INDEX IF NOT EXISTS bones_model ON bones(model_id);
+CREATE INDEX IF NOT EXISTS bodyparts_model ON bodyparts(model_id);
+'''
+
+# results are committed in groups, so an interrupted update keeps most of its work
+_COMMIT_EVERY = 256
+
+
+def extract(mdl: MDL) -> Dict[str, Any]:
+    # everything the catalog stores about a model, as plain picklable rows
+    return {
+        'checksum': mdl.checksum,
+        'name': mdl.name,
+        'version': mdl.version,
+        'flags': int(mdl.flags),
+        'textures': [texture.name for texture in mdl.textures],
+        'skins': [[texture.name for texture in family] for family in mdl.skins],
+        'sequences': [
+            (seq.label, seq.activity_name, seq.activity, seq.flags) for seq in mdl.seq_descs
+        ],
+        'bones': list(zip(mdl.bone_table.names, mdl.bone_table.parent_ids.tolist())),
+        'bodyparts': [(bodypart.name, bodypart.num_models) for bodypart in mdl.bodyparts],
+    }
+
+
+class CatalogUpdate:
+    # number of models parsed, unchanged, removed and failed
+    parsed: int
+    unchanged: int
+    removed: int
+    failed: int
+
+    def __init__(self):
+        self.parsed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.failed = 0
+
+    def __str__(self) -> str:
+        return 'parsed %d, unchanged %d, removed %d, failed %d' % (
+            self.parsed, self.unchanged, self.removed, self.failed)
+
+
+class Catalog:
+    path: str
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = os.fspath(path)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> 'Catalog':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(
+        self,
+        roots: Union[str, os.PathLike, Iterable[Union[str, os.PathLike]]],
+        workers: Optional[int] = None,
+        chunksize: int = 16,
+        progress: Optional[Callable[[int, int, BatchResult], None]] = None,
+    ) -> CatalogUpdate:
+        # brings the catalog up to date with every .mdl under `roots`.
+        # files whose size and mtime are unchanged are skipped without being opened, the rest are
+        # parsed again. editing a file can keep both its size and its header checksum
+        if isinstance(roots, (str, os.PathLike)):
+            roots = [roots]
+        paths: List[str] = []
+        for root in roots:
+            paths.extend([os.fspath(root)] if os.path.isfile(root) else find_models(root))
+        paths = [os.path.abspath(path) for path in paths]
+
+        stats = CatalogUpdate()
+        known: Dict[str, Tuple[int, int, int]] = {
+            path: (id, mtime_ns, size)
+            for (id, path, mtime_ns, size) in self._conn.execute('SELECT id, path, mtime_ns, size FROM models')
+        }
+        stat: Dict[str, os.stat_result] = {}
+        stale: List[str] = []
+        with self._conn:
+            for path in paths:
+                st = stat[path] = os.stat(path)
+                row = known.get(path)
+                if row is not None and row[1:] == (st.st_mtime_ns, st.st_size):
+                    stats.unchanged += 1
+                    continue
+                stale.append(path)
+
+            seen = set(paths)
+            for path, (id, *_) in known.items():
+                if path not in seen and not os.path.exists(path):
+                    self._conn.execute('DELETE FROM models WHERE id = ?', (id,))
+                    stats.removed += 1
+
+        pending = 0
+        # only the .mdl of a model is parsed, its .vvd and .vtx are neither stored nor validated
+        results = load_batch(stale, extract, workers=workers, chunksize=chunksize, progress=progress, loader=MDL)
+        for result in results:
+            self._store(result, stat[result.path])
+            if result.ok:
+                stats.parsed += 1
+            else:
+                stats.failed += 1
+            pending += 1
+            if pending >= _COMMIT_EVERY:
+                self._conn.commit()
+                pending = 0
+        self._conn.commit()
+        return stats
+
+    def _store(self, result: BatchResult, st: os.stat_result):
+        conn = self._conn
+        conn.execute('DELETE FROM models WHERE path = ?', (result.path,))
+        if not result.ok:
+            conn.execute(
+                'INSERT INTO models (path, mtime_ns, size, error) VALUES (?, ?, ?, ?)',
+                (result.path, st.st_mtime_ns, st.st_size, result.error),
+            )
+            return
+        value = result.value
+        id = conn.execute(
+            'INSERT INTO models (path, mtime_ns, size, checksum, name, version, flags,'
+            ' num_bones, num_seq_descs, num_bodyparts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (result.path, st.st_mtime_ns, st.st_size, value['checksum'], value['name'], value['version'],
+             value['flags'], len(value['bones']), len(value['sequences']), len(value['bodyparts'])),
+        ).lastrowid
+        conn.executemany(
+            'INSERT INTO textures VALUES (?, ?, ?)',
+            [(id, i, name) for i, name in enumerate(value['textures'])],
+        )
+        conn.executemany(
+            'INSERT INTO skins VALUES (?, ?, ?, ?)',
+            [(id, i, j, name) for i, family in enumerate(value['skins']) for j, name in enumerate(family)],
+        )
+        conn.executemany(
+            'INSERT INTO sequences VALUES (?, ?, ?, ?, ?, ?)',
+            [(id, i, *seq) for i, seq in enumerate(value['sequences'])],
+        )
+        conn.executemany(
+            'INSERT INTO bones VALUES (?, ?, ?, ?)',
+            [(id, i, *bone) for i, bone in enumerate(value['bones'])],
+        )
+        conn.executemany(
+            'INSERT INTO bodyparts VALUES (?, ?, ?, ?)',
+            [(id, i, *bodypart) for i, bodypart in enumerate(value['bodyparts'])],
+        )
+
+    def execute(self, sql: str, parameters: Iterable[Any] = ()) -> sqlite3.Cursor:
+        return self._conn.execute(sql, tuple(parameters))
+
+    def _paths(self, sql: str, *parameters: Any) -> List[str]:
+        return [path for (path,) in self._conn.execute(sql, parameters)]
+
+    def models_with_texture(self, name: str) -> List[str]:
+        # texture names compare case insensitively, like the engine does
+        return self._paths(
+            'SELECT path FROM models WHERE id IN (SELECT model_id FROM textures WHERE name = ?) ORDER BY path', name)
+
+    def models_with_activity(self, activity_name: str) -> List[str]:
+        return self._paths(
+            'SELECT path FROM models WHERE id IN (SELECT model_id FROM sequences WHERE activity_name = ?)'
+            ' ORDER BY path', activity_name)
+
+    def models_with_sequence(self, label: str) -> List[str]:
+        return self._paths(
+            'SELECT path FROM models WHERE id IN (SELECT model_id FROM sequences WHERE label = ?) ORDER BY path',
+            label)
+
+    def models_with_bone(self, name: str) -> List[str]:
+        return self._paths(
+            'SELECT path FROM models WHERE id IN (SELECT model_id FROM bones WHERE name = ?) ORDER BY path', name)
+
+    def models_with_bones(self, minimum: int) -> List[str]:
+        return self._paths('SELECT path FROM models WHERE num_bones >= ? ORDER BY path', minimum)
+
+    def failures(self) -> List[Tuple[str, str]]:
+        return list(self._conn.execute('SELECT path, error FROM models WHERE error IS NOT NULL ORDER BY path'))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m srcstudiomodel.catalog',
+        description='index textures, skins, sequences, bones and body parts of every model into a sqlite database',
+    )
+    parser.add_argument('database', help='sqlite database, created when missing')
+    parser.add_argument('roots', nargs='+', help='directories or .mdl files')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: cpu count)')
+    parser.add_argument('--chunksize', type=int, default=16, help='models per task')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report progress')
+    args = parser.parse_args(argv)
+
+    def report(done: int, total: int, result: BatchResult):
+        if not args.quiet:
+            print('\r%d/%d' % (done, total), end='' if done < total else '\n', file=sys.stderr)
+
+    with Catalog(args.database) as catalog:
+        stats = catalog.update(args.roots, workers=args.jobs, chunksize=args.chunksize, progress=report)
+    print(stats)
+    return 1 if stats.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
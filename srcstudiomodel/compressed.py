@@ -1,7 +1,9 @@
-from io import BufferedReader
 import math
+import struct
+
+import numpy as np
+
 from srcstudiomodel.type import Vector3, Vector4
-from srcstudiomodel.util import _struct_unpack
 
 # *******************
 # compressed_vector.h
@@ -13,8 +15,8 @@ _bits16 = 0b1111111111111111
 _bits21 = 0b111111111111111111111
 
 
-def vec32(buf: BufferedReader) -> Vector3:
-    v = int.from_bytes(buf.read(4), 'little')
+def vec32(data: bytes, offset: int = 0) -> Vector3:
+    v = int.from_bytes(data[offset:offset + 4], 'little')
     x = v >> 00 & _bits10
     y = v >> 10 & _bits10
     z = v >> 20 & _bits10
@@ -23,12 +25,12 @@ def vec32(buf: BufferedReader) -> Vector3:
     return ((x - 512) * f, (y - 512) * f, (z - 512) * f)
 
 
-def vec48(buf: BufferedReader) -> Vector3:
-    return _struct_unpack('=eee', buf)
+def vec48(data: bytes, offset: int = 0) -> Vector3:
+    return struct.unpack_from('=eee', data, offset)
 
 
-def quat48(buf: BufferedReader) -> Vector4:
-    v = int.from_bytes(buf.read(6), 'little')
+def quat48(data: bytes, offset: int = 0) -> Vector4:
+    v = int.from_bytes(data[offset:offset + 6], 'little')
     div = (1.0 / 32768.0)
     x = ((v >> 00 & _bits16) - 32768) * div
     y = ((v >> 16 & _bits16) - 32768) * div
@@ -39,8 +41,8 @@ def quat48(buf: BufferedReader) -> Vector4:
     return (x, y, z, w)
 
 
-def quat64(buf: BufferedReader) -> Vector4:
-    v = int.from_bytes(buf.read(8), 'little')
+def quat64(data: bytes, offset: int = 0) -> Vector4:
+    v = int.from_bytes(data[offset:offset + 8], 'little')
     div = (1.0 / 1048576.5)
     x = ((v >> 00 & _bits21) - 1048576) * div
     y = ((v >> 21 & _bits21) - 1048576) * div
@@ -49,3 +51,46 @@ def quat64(buf: BufferedReader) -> Vector4:
     if v & (1 << 63):
         w = -w
     return (x, y, z, w)
+
+
+# array versions of above, these decode `num` packed values laid out back to back
+# and return (num, 3) or (num, 4) float64 arrays equal to the scalar ones
+
+
+_vec32_scale = np.array([4.0, 16.0, 32.0, 64.0]) / 512.0
+
+
+def vec32_array(data: bytes, num: int = -1, offset: int = 0) -> np.ndarray:
+    v = np.frombuffer(data, '<u4', num, offset)
+    xyz = (v[:, np.newaxis] >> np.array([0, 10, 20], np.uint32)) & _bits10
+    return (xyz - 512.0) * _vec32_scale[v >> 30][:, np.newaxis]
+
+
+def vec48_array(data: bytes, num: int = -1, offset: int = 0) -> np.ndarray:
+    return np.frombuffer(data, '<f2', num * 3 if num >= 0 else -1, offset).reshape(-1, 3).astype(np.float64)
+
+
+def _quat_w(q: np.ndarray, negative: np.ndarray) -> np.ndarray:
+    x, y, z = q[:, 0], q[:, 1], q[:, 2]
+    w = np.sqrt(1.0 - x*x - y*y - z*z)
+    q[:, 3] = np.where(negative, -w, w)
+    return q
+
+
+def quat48_array(data: bytes, num: int = -1, offset: int = 0) -> np.ndarray:
+    v = np.frombuffer(data, '<u2', num * 3 if num >= 0 else -1, offset).reshape(-1, 3)
+    q = np.empty((len(v), 4))
+    q[:, 0] = (v[:, 0] - 32768.0) * (1.0 / 32768.0)
+    q[:, 1] = (v[:, 1] - 32768.0) * (1.0 / 32768.0)
+    q[:, 2] = ((v[:, 2] & _bits15) - 16384.0) * (1.0 / 16384.0)
+    return _quat_w(q, v[:, 2] >> 15 != 0)
+
+
+def quat64_array(data: bytes, num: int = -1, offset: int = 0) -> np.ndarray:
+    v = np.frombuffer(data, '<u8', num, offset)
+    q = np.empty((len(v), 4))
+    div = (1.0 / 1048576.5)
+    q[:, 0] = ((v >> 00 & _bits21) - 1048576.0) * div
+    q[:, 1] = ((v >> 21 & _bits21) - 1048576.0) * div
+    q[:, 2] = ((v >> 42 & _bits21) - 1048576.0) * div
+    return _quat_w(q, v >> 63 != 0)
@@ -0,0 +1,245 @@
+from typing import List, Mapping, Tuple, Union
+
+import numpy as np
+
+from .mdl import MDL, MDLFlexController, MDLFlexDesc, MDLFlexRule
+from .vvd import VVD, VVD_VERTEX_DTYPE
+
+# mstudioflexop_t ops
+_CONST = 1
+_FETCH1 = 2
+_FETCH2 = 3
+_ADD = 4
+_SUB = 5
+_MUL = 6
+_DIV = 7
+_NEG = 8
+_EXP = 9
+_OPEN = 10
+_CLOSE = 11
+_COMMA = 12
+_MAX = 13
+_MIN = 14
+_2WAY_0 = 15
+_2WAY_1 = 16
+_NWAY = 17
+_COMBO = 18
+_DOMINATE = 19
+_DME_LOWER_EYELID = 20
+_DME_UPPER_EYELID = 21
+
+Controllers = Union[Mapping[str, Union[float, np.ndarray]], np.ndarray]
+
+
+def _remap_clamped(value: np.ndarray, a: float, b: float, c: float, d: float) -> np.ndarray:
+    return c + (d - c) * np.clip((value - a) / (b - a), 0.0, 1.0)
+
+
+def _ramp(value: np.ndarray, x: np.ndarray, y: np.ndarray, z: np.ndarray, w: np.ndarray) -> np.ndarray:
+    # 0 outside (x, w), rising from x to y, 1 from y to z and falling from z to w
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(
+            (value <= x) | (value >= w), 0.0,
+            np.where(value < y, (value - x) / (y - x), np.where(value > z, (w - value) / (w - z), 1.0)),
+        )
+
+
+def _run_rule(rule: MDLFlexRule, src: np.ndarray, dest: np.ndarray) -> np.ndarray:
+    # the stack machine of a flex rule, every value is an array over the batch shape of src
+    stack: List[np.ndarray] = []
+    for (op, index, value) in rule.ops:
+        if op == _CONST:
+            stack.append(np.full(src.shape[:-1], value))
+        elif op == _FETCH1:
+            stack.append(src[..., index])
+        elif op == _FETCH2:
+            stack.append(dest[..., index])
+        elif op in (_ADD, _SUB, _MUL, _DIV, _MAX, _MIN):
+            b = stack.pop()
+            a = stack.pop()
+            if op == _ADD:
+                stack.append(a + b)
+            elif op == _SUB:
+                stack.append(a - b)
+            elif op == _MUL:
+                stack.append(a * b)
+            elif op == _DIV:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    stack.append(np.where(b > 0.0001, a / b, 0.0))
+            elif op == _MAX:
+                stack.append(np.maximum(a, b))
+            else:
+                stack.append(np.minimum(a, b))
+        elif op == _NEG:
+            stack.append(-stack.pop())
+        elif op == _2WAY_0:
+            stack.append(_remap_clamped(src[..., index], -1.0, 0.0, 1.0, 0.0))
+        elif op == _2WAY_1:
+            stack.append(_remap_clamped(src[..., index], 0.0, 1.0, 0.0, 1.0))
+        elif op == _NWAY:
+            # the value controller is a constant, the ramp comes from the four values below it
+            controller = int(np.ravel(stack.pop())[0])
+            (x, y, z, w) = stack[-4:]
+            del stack[-4:]
+            stack.append(_ramp(src[..., controller], x, y, z, w) * src[..., index])
+        elif op == _COMBO:
+            product = stack[-index]
+            for factor in stack[len(stack) - index + 1:]:
+                product = product * factor
+            del stack[-index:]
+            stack.append(product)
+        elif op == _DOMINATE:
+            product = stack[-index]
+            for factor in stack[len(stack) - index + 1:]:
+                product = product * factor
+            del stack[-index:]
+            stack[-1] = stack[-1] * (1.0 - product)
+        elif op in (_EXP, _OPEN, _CLOSE, _COMMA):
+            # only used while compiling the rules
+            continue
+        else:
+            raise Exception('unsupported flex op %d' % op)
+    return stack[0] if stack else np.zeros(src.shape[:-1])
+
+
+class Morph:
+    # the flexes (morph targets) of every mesh of an MDL, gathered into flat sparse arrays over the
+    # rows of VVD.vertex_array. the entries of a flex are contiguous, so flexes without weight
+    # are skipped like the engine does, and the rest is summed per vertex with one bincount
+    controllers: List[MDLFlexController]
+    flex_descs: List[MDLFlexDesc]
+    rules: List[MDLFlexRule]
+
+    # (flexes,) of every MDLFlex
+    flex_desc: np.ndarray
+    flex_pair: np.ndarray
+    targets: np.ndarray  # (flexes, 4)
+
+    # (entries,) of every vertex delta, flex after flex
+    flex_ids: np.ndarray
+    vertex_ids: np.ndarray
+    position_deltas: np.ndarray  # (entries, 3) float32
+    normal_deltas: np.ndarray  # (entries, 3) float32
+    sides: np.ndarray  # float32 0 (flex_desc) to 1 (flex_pair)
+
+    def __init__(self, mdl: MDL, vvd: VVD):
+        self.controllers = mdl.flex_controllers
+        self.flex_descs = mdl.flex_descs
+        self.rules = mdl.flex_rules
+
+        (flex_desc, flex_pair, targets) = ([], [], [])
+        (flex_ids, vertex_ids, deltas, ndeltas, sides) = ([], [], [], [], [])
+        for bodypart in mdl.bodyparts:
+            for model in bodypart.models:
+                # lod 0 vertices of a model start at its vertex_index (a byte offset)
+                base = model.vertex_index // VVD_VERTEX_DTYPE.itemsize
+                for mesh in model.meshes:
+                    for flex in mesh.flexes:
+                        flex_ids.append(np.full(flex.num_verts, len(flex_desc), np.int32))
+                        vertex_ids.append(flex.vert_anims['index'].astype(np.int64) + (base + mesh.vertex_offset))
+                        deltas.append(flex.vert_anims['delta'])
+                        ndeltas.append(flex.vert_anims['ndelta'])
+                        sides.append(flex.vert_anims['side'])
+                        flex_desc.append(flex.flex_desc)
+                        flex_pair.append(flex.flex_pair)
+                        targets.append(flex.targets)
+        self.flex_desc = np.array(flex_desc, np.int64)
+        self.flex_pair = np.array(flex_pair, np.int64)
+        self.targets = np.array(targets, np.float64).reshape(-1, 4)
+
+        if not vertex_ids:
+            (flex_ids, vertex_ids) = ([np.zeros(0, np.int32)], [np.zeros(0, np.int64)])
+            (deltas, ndeltas) = ([np.zeros((0, 3), np.float16)], [np.zeros((0, 3), np.float16)])
+            sides = [np.zeros(0, np.uint8)]
+        self.flex_ids = np.concatenate(flex_ids)
+        # lod 0 vertex ids are rows of vertex_array once the fixups are applied
+        self.vertex_ids = vvd.lod_vertex_indices(0)[np.concatenate(vertex_ids)]
+        self.position_deltas = np.concatenate(deltas).astype(np.float32)
+        self.normal_deltas = np.concatenate(ndeltas).astype(np.float32)
+        self.sides = np.concatenate(sides).astype(np.float32) / 255.0
+
+        # first entry of every flex, and the flat index of every delta component in (vertices, 3)
+        self._bounds = np.searchsorted(self.flex_ids, np.arange(len(self.flex_desc) + 1))
+        self._components = self.vertex_ids[:, np.newaxis] * 3 + np.arange(3)
+
+    @property
+    def num_flexes(self) -> int:
+        return len(self.flex_desc)
+
+    def controller_values(self, controllers: Controllers) -> np.ndarray:
+        # values (..., controllers) from a name -> value mapping (missing ones are 0) or an array,
+        # clamped to the range of every controller
+        if isinstance(controllers, Mapping):
+            names = {controller.name: i for i, controller in enumerate(self.controllers)}
+            shape = np.broadcast(*controllers.values()).shape if controllers else ()
+            values = np.zeros(shape + (len(self.controllers),))
+            for name, value in controllers.items():
+                if name not in names:
+                    raise Exception('unknown flex controller %s' % name)
+                values[..., names[name]] = value
+        else:
+            values = np.array(controllers, np.float64)
+            if values.shape[-1:] != (len(self.controllers),):
+                raise ValueError('expected values of %d flex controllers' % len(self.controllers))
+        low = np.array([controller.min for controller in self.controllers])
+        high = np.array([controller.max for controller in self.controllers])
+        return np.clip(values, np.minimum(low, high), np.maximum(low, high))
+
+    def flex_weights(self, controllers: Controllers) -> np.ndarray:
+        # weights (..., flex_descs) of controller values, by running the flex rules of the mdl
+        src = self.controller_values(controllers)
+        dest = np.zeros(src.shape[:-1] + (len(self.flex_descs),))
+        for rule in self.rules:
+            dest[..., rule.flex] = _run_rule(rule, src, dest)
+        return dest
+
+    def apply_weights(
+        self,
+        vertices: Union[VVD, np.ndarray],
+        weights: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # positions and normals (..., vertices, 3) of VVD vertices moved by flex desc weights
+        # (..., flex_descs). normals are not normalised again, like the engine does
+        if isinstance(vertices, VVD):
+            vertices = vertices.vertex_array
+        weights = np.asarray(weights, np.float64)
+        shape = weights.shape[:-1] + (len(vertices), 3)
+        batch = (int(np.prod(weights.shape[:-1])), len(self.flex_desc))
+        (x, y, z, w) = self.targets.T
+        flex_weights = _ramp(weights[..., self.flex_desc], x, y, z, w).reshape(batch)
+        pair_weights = _ramp(weights[..., self.flex_pair], x, y, z, w).reshape(batch)
+
+        positions = np.empty((len(flex_weights), len(vertices), 3), np.float32)
+        normals = np.empty((len(flex_weights), len(vertices), 3), np.float32)
+        for i in range(len(flex_weights)):
+            (positions[i], normals[i]) = self._apply(vertices, flex_weights[i], pair_weights[i])
+        return (positions.reshape(shape), normals.reshape(shape))
+
+    def _apply(
+        self,
+        vertices: np.ndarray,
+        flex_weights: np.ndarray,
+        pair_weights: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # entries of the flexes with any weight
+        active = np.flatnonzero((flex_weights != 0.0) | (pair_weights != 0.0))
+        if len(active) == len(self.flex_desc):
+            entries = slice(None)
+        else:
+            (starts, lengths) = (self._bounds[active], self._bounds[active + 1] - self._bounds[active])
+            ends = np.cumsum(lengths)
+            entries = np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - (ends - lengths), lengths)
+        (flex_ids, sides) = (self.flex_ids[entries], self.sides[entries])
+        # (entries, 1) weight of every delta, between its flex and the paired one of the other side
+        entry = (flex_weights[flex_ids] * (1.0 - sides) + pair_weights[flex_ids] * sides)[:, np.newaxis]
+        components = self._components[entries].ravel()
+
+        results = []
+        for (field, deltas) in (('position', self.position_deltas), ('normal', self.normal_deltas)):
+            moved = np.bincount(components, (entry * deltas[entries]).ravel(), len(vertices) * 3)
+            results.append(vertices[field] + moved.reshape(-1, 3))
+        return (results[0], results[1])
+
+    def apply(self, vertices: Union[VVD, np.ndarray], controllers: Controllers) -> Tuple[np.ndarray, np.ndarray]:
+        # positions and normals (..., vertices, 3) of VVD vertices with flex controller values
+        return self.apply_weights(vertices, self.flex_weights(controllers))
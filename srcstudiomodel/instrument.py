@@ -0,0 +1,158 @@
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .type import Source
+from .util import Reader
+
+
+class CountingReader(Reader):
+    # a Reader which counts the bytes it hands out and the positioned accesses ("seeks") into them.
+    # names come from a cache, so only the first lookup of an offset touches the buffer.
+    # every thread is counted apart, so tables parsed at the same time are measured apart
+    _counts: Dict[int, List[int]]
+
+    def __init__(self, src: Source):
+        super().__init__(src)
+        self._counts = {}
+
+    def _count(self, size: int):
+        counts = self._counts.get(threading.get_ident())
+        if counts is None:
+            counts = self._counts.setdefault(threading.get_ident(), [0, 0])
+        counts[0] += size
+        counts[1] += 1
+
+    def thread_counts(self) -> Tuple[int, int]:
+        # bytes read and seeks of the calling thread
+        (bytes_read, seeks) = self._counts.get(threading.get_ident(), (0, 0))
+        return (bytes_read, seeks)
+
+    @property
+    def bytes_read(self) -> int:
+        return sum(counts[0] for counts in list(self._counts.values()))
+
+    @property
+    def seeks(self) -> int:
+        return sum(counts[1] for counts in list(self._counts.values()))
+
+    def unpack(self, format: str, offset: int) -> tuple:
+        values = super().unpack(format, offset)
+        self._count(struct.calcsize(format))
+        return values
+
+    def unpack_struct(self, s: struct.Struct, offset: int) -> tuple:
+        values = super().unpack_struct(s, offset)
+        self._count(s.size)
+        return values
+
+    def view(self, offset: int, size: int) -> memoryview:
+        view = super().view(offset, size)
+        self._count(len(view))
+        return view
+
+    def read(self, offset: int, size: int) -> bytes:
+        data = super().read(offset, size)
+        self._count(len(data))
+        return data
+
+    def array(self, dtype: np.dtype, offset: int, num: int) -> np.ndarray:
+        array = super().array(dtype, offset, num)
+        self._count(array.nbytes)
+        return array
+
+    def string(self, offset: int) -> str:
+        if offset in self._strings:
+            return self._strings[offset]
+        s = super().string(offset)
+        self._count(len(s.encode()) + 1)
+        return s
+
+
+class TableStats(NamedTuple):
+    file: str  # 'mdl', 'vvd' or 'vtx'
+    table: str
+    seconds: float
+    bytes_read: int
+    seeks: int
+    # net number of python allocations the table keeps alive (objects, arrays, strings)
+    objects: int
+
+
+class Instrument:
+    # collects a TableStats for every table parsed by the MDL, VVD and VTX objects it is given to.
+    # the numbers of a table exclude those of tables it pulls in (e.g. bone_table for anim_descs),
+    # so they add up to the cost of the whole load. tables parsed by other threads at the same
+    # time are not part of each other's numbers, except for allocations which are process wide
+    records: List[TableStats]
+
+    def __init__(self):
+        self.records = []
+        # measurements in progress of every thread, innermost last
+        self._nested: Dict[int, List[List[Any]]] = {}
+
+    def reader(self, src: Source) -> CountingReader:
+        return src if isinstance(src, CountingReader) else CountingReader(src)
+
+    @contextmanager
+    def measure(self, file: str, table: str, buf: CountingReader) -> Iterator[None]:
+        # totals of the measurements made while this one runs
+        nested = [0.0, 0, 0, 0]
+        ident = threading.get_ident()
+        stack = self._nested.setdefault(ident, [])
+        stack.append(nested)
+        (bytes_read, seeks) = buf.thread_counts()
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            counts = buf.thread_counts()
+            total = [
+                time.perf_counter() - start,
+                counts[0] - bytes_read,
+                counts[1] - seeks,
+                sys.getallocatedblocks() - blocks,
+            ]
+            stack.pop()
+            if stack:
+                outer = stack[-1]
+                for i, value in enumerate(total):
+                    outer[i] += value
+            else:
+                del self._nested[ident]
+            self.records.append(TableStats(file, table, *(t - n for t, n in zip(total, nested))))
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        return [record._asdict() for record in self.records]
+
+    def totals(self) -> Dict[str, Any]:
+        return {
+            field: sum(getattr(record, field) for record in self.records)
+            for field in ('seconds', 'bytes_read', 'seeks', 'objects')
+        }
+
+    def clear(self):
+        self.records.clear()
+
+    def __str__(self) -> str:
+        lines = ['%-4s %-16s %10s %12s %8s %8s' % ('file', 'table', 'us', 'bytes', 'seeks', 'objects')]
+        for record in self.records:
+            lines.append('%-4s %-16s %10.1f %12d %8d %8d' % (
+                record.file, record.table, record.seconds * 1e6, record.bytes_read, record.seeks, record.objects))
+        return '\n'.join(lines)
+
+
+_DISABLED = nullcontext()
+
+
+def measure(instrument: Optional[Instrument], file: str, table: str, buf: Reader) -> ContextManager[None]:
+    # a shared no-op when instrumentation is disabled
+    if instrument is None:
+        return _DISABLED
+    return instrument.measure(file, table, buf)
@@ -0,0 +1,56 @@
+import numpy as np
+
+# *********
+# mathlib.h
+# *********
+# every function takes arrays with any number of leading dimensions
+
+
+def angle_quaternion(angles: np.ndarray) -> np.ndarray:
+    # RadianEuler (roll, pitch, yaw) -> Quaternion (x, y, z, w)
+    angles = np.asarray(angles, np.float64) * 0.5
+    sr, sp, sy = np.sin(angles[..., 0]), np.sin(angles[..., 1]), np.sin(angles[..., 2])
+    cr, cp, cy = np.cos(angles[..., 0]), np.cos(angles[..., 1]), np.cos(angles[..., 2])
+    return np.stack([
+        sr * cp * cy - cr * sp * sy,
+        cr * sp * cy + sr * cp * sy,
+        cr * cp * sy - sr * sp * cy,
+        cr * cp * cy + sr * sp * sy,
+    ], axis=-1)
+
+
+def quaternion_matrix(quat: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    # Quaternion and position -> matrix3x4_t
+    quat = np.asarray(quat, np.float64)
+    x, y, z, w = quat[..., 0], quat[..., 1], quat[..., 2], quat[..., 3]
+    matrix = np.empty(quat.shape[:-1] + (3, 4))
+    matrix[..., 0, 0] = 1.0 - 2.0 * y * y - 2.0 * z * z
+    matrix[..., 1, 0] = 2.0 * x * y + 2.0 * w * z
+    matrix[..., 2, 0] = 2.0 * x * z - 2.0 * w * y
+    matrix[..., 0, 1] = 2.0 * x * y - 2.0 * w * z
+    matrix[..., 1, 1] = 1.0 - 2.0 * x * x - 2.0 * z * z
+    matrix[..., 2, 1] = 2.0 * y * z + 2.0 * w * x
+    matrix[..., 0, 2] = 2.0 * x * z + 2.0 * w * y
+    matrix[..., 1, 2] = 2.0 * y * z - 2.0 * w * x
+    matrix[..., 2, 2] = 1.0 - 2.0 * x * x - 2.0 * y * y
+    matrix[..., :, 3] = pos
+    return matrix
+
+
+def concat_transforms(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # a * b of two matrix3x4_t
+    out = np.empty(np.broadcast_shapes(a.shape, b.shape))
+    out[..., :3] = a[..., :3] @ b[..., :3]
+    out[..., 3] = (a[..., :3] @ b[..., 3:])[..., 0] + a[..., 3]
+    return out
+
+
+def quaternion_blend(p: np.ndarray, q: np.ndarray, t: np.ndarray) -> np.ndarray:
+    # normalized lerp from p to q, taking the shorter way around like QuaternionBlend
+    p = np.asarray(p, np.float64)
+    q = np.asarray(q, np.float64)
+    t = np.asarray(t, np.float64)
+    q = np.where(np.sum(p * q, axis=-1, keepdims=True) < 0.0, -q, q)
+    blend = p * (1.0 - t) + q * t
+    length = np.linalg.norm(blend, axis=-1, keepdims=True)
+    return np.divide(blend, length, out=np.copy(blend), where=length > 0.0)
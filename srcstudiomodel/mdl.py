@@ -1,31 +1,66 @@
-from io import BufferedReader
-from typing import List, Optional, Tuple
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
 
 from srcstudiomodel.mdl_enum import MDLAnimDescFlag, MDLAnimFlag, MDLFlag
 
-from .util import _struct_unpack
-from .type import Matrix3x4, Vector3, Vector4
+from .util import Layout, Reader, _read_head
+from .ani import ANI
+from .instrument import Instrument, measure
+from .type import Matrix3x4, Source, Vector3, Vector4
+from .mathlib import angle_quaternion, quaternion_blend
 from . import compressed
 
 
-def _read_name64(buf: BufferedReader) -> str:
-    return buf.read(64).decode().rstrip('\0')
-
-
-def _read_strings(buf: BufferedReader, off: int, num: int = 1) -> List[str]:
-    start = buf.tell()
-    buf.seek(off)
-    result = [''] * num
-    for i in range(num):
-        s = b''
-        while True:
-            p = buf.read(1)
-            if p == b'\0':
-                break
-            s += p
-        result[i] = s.decode()
-    buf.seek(start)
-    return result
+# mstudiovertanim_t, deltas are float16
+MDL_VERTANIM_DTYPE = np.dtype([
+    ('index', '<u2'),
+    ('speed', 'u1'),
+    ('side', 'u1'),
+    ('delta', '<f2', (3,)),
+    ('ndelta', '<f2', (3,)),
+])
+# mstudiovertanim_wrinkle_t
+MDL_VERTANIM_WRINKLE_DTYPE = np.dtype([
+    ('index', '<u2'),
+    ('speed', 'u1'),
+    ('side', 'u1'),
+    ('delta', '<f2', (3,)),
+    ('ndelta', '<f2', (3,)),
+    ('wrinkle_delta', '<i2'),
+])
+# StudioVertAnimType_t
+_STUDIO_VERT_ANIM_WRINKLE = 1
+
+
+class MDLFlex:
+    flex_desc: int
+    # the weight of flex_desc ramps up from targets[0] to targets[1] and down from targets[2] to targets[3]
+    targets: Tuple[float, float, float, float]
+    num_verts: int
+    vert_index: int
+    # the flex desc of the other side, blended in by MDL_VERTANIM_DTYPE side
+    flex_pair: int
+    vert_anim_type: int
+
+    # sparse vertex deltas, index is a vertex of the mesh
+    vert_anims: np.ndarray  # MDL_VERTANIM_DTYPE or MDL_VERTANIM_WRINKLE_DTYPE
+
+    # mstudioflex_t
+    _layout = Layout(
+        ('flex_desc', 'i'), ('targets', '4f'), ('num_verts', 'i'), ('vert_index', 'i'), ('flex_pair', 'i'),
+        ('vert_anim_type', 'B'), ('_unused', '27x'),
+    )
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        self._layout.assign(self, self._layout.unpack(buf, offset))
+        dtype = MDL_VERTANIM_WRINKLE_DTYPE if self.vert_anim_type == _STUDIO_VERT_ANIM_WRINKLE else MDL_VERTANIM_DTYPE
+        self.vert_anims = buf.array(dtype, offset + self.vert_index, self.num_verts)
 
 
 class MDLMesh:
@@ -39,14 +74,22 @@ class MDLMesh:
     material_params: int
     mesh_id: int
     center: Tuple[float, float, float]
+    num_lod_vertexes: Tuple[int, ...]
 
-    def __init__(self, buf: BufferedReader):
-        (self.material, self.model_index, self.num_vertices,
-         self.vertex_offset, self.num_flexes, self.flex_index,
-         self.material_type, self.material_params, self.mesh_id) \
-            = _struct_unpack('=iiiiiiiii', buf)
-        self.center = _struct_unpack('=fff', buf)
-        buf.seek(68, 1)  # this need fix in future
+    flexes: List[MDLFlex]
+
+    # mstudiomesh_t
+    _layout = Layout(
+        ('material', 'i'), ('model_index', 'i'), ('num_vertices', 'i'), ('vertex_offset', 'i'),
+        ('num_flexes', 'i'), ('flex_index', 'i'), ('material_type', 'i'), ('material_params', 'i'),
+        ('mesh_id', 'i'), ('center', '3f'),
+        ('_model_vertex_data', 'i'), ('num_lod_vertexes', '8i'), ('_unused', '32x'),
+    )
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        self._layout.assign(self, self._layout.unpack(buf, offset))
+        self.flexes = [MDLFlex(buf, offset + self.flex_index + i * MDLFlex._size) for i in range(self.num_flexes)]
 
 
 class MDLModel:
@@ -65,17 +108,22 @@ class MDLModel:
 
     meshes: List[MDLMesh]
 
-    def __init__(self, buf: BufferedReader):
-        start = buf.tell()
-        self.name = _read_name64(buf)
-        (self.type, self.bounding_radius, self.num_meshes, self.mesh_index,
-         self.num_vertices, self.vertex_index, self.tangents_index,
-         self.num_attachments, self.attachment_index, self.num_eyeballs,
-         self.eyeball_index) = _struct_unpack('=ifiiiiiiiii', buf)
-        end = buf.seek(40, 1)
-        buf.seek(start + self.mesh_index)
-        self.meshes = list(map(MDLMesh, [buf]*self.num_meshes))
-        buf.seek(end)
+    # mstudiomodel_t
+    _layout = Layout(
+        ('_name', '64s'), ('type', 'i'), ('bounding_radius', 'f'), ('num_meshes', 'i'), ('mesh_index', 'i'),
+        ('num_vertices', 'i'), ('vertex_index', 'i'), ('tangents_index', 'i'),
+        ('num_attachments', 'i'), ('attachment_index', 'i'), ('num_eyeballs', 'i'), ('eyeball_index', 'i'),
+        ('_vertex_data', '8x'), ('_unused', '32x'),
+    )
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        values = self._layout.unpack(buf, offset)
+        self._layout.assign(self, values)
+        self.name = values[0].decode().rstrip('\0')
+        self.meshes = [
+            MDLMesh(buf, offset + self.mesh_index + i * MDLMesh._size) for i in range(self.num_meshes)
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -86,82 +134,237 @@ class MDLTexture:
     flags: int
     used: int
 
-    def __init__(self, buf: BufferedReader):
-        start = buf.tell()
-        (name_index, self.flags, self.used) = \
-            _struct_unpack('=iii', buf)
-        self.name = _read_strings(buf, start + name_index)[0]
-        buf.seek(52, 1)
+    # mstudiotexture_t
+    _layout = Layout(('_name_index', 'i'), ('flags', 'i'), ('used', 'i'), ('_unused', '52x'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        values = self._layout.unpack(buf, offset)
+        self._layout.assign(self, values)
+        self.name = buf.string(offset + values[0])
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class MDLFlexDesc:
+    name: str
+
+    # mstudioflexdesc_t
+    _layout = Layout(('_name_index', 'i'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        self.name = buf.string(offset + self._layout.unpack(buf, offset)[0])
 
     def __str__(self) -> str:
         return self.name
 
 
+class MDLFlexController:
+    type: str
+    name: str
+    local_to_global: int
+    min: float
+    max: float
+
+    # mstudioflexcontroller_t
+    _layout = Layout(
+        ('_type_index', 'i'), ('_name_index', 'i'), ('local_to_global', 'i'), ('min', 'f'), ('max', 'f'),
+    )
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        values = self._layout.unpack(buf, offset)
+        self._layout.assign(self, values)
+        self.type = buf.string(offset + values[0])
+        self.name = buf.string(offset + values[1])
+
+    def __str__(self) -> str:
+        return self.name
+
+
+# mstudioflexop_t, the operand is an index or a float depending on the op
+_flex_op_dtype = np.dtype({'names': ['op', 'index', 'value'], 'formats': ['<i4', '<i4', '<f4'], 'offsets': [0, 4, 4]})
+
+
+class MDLFlexRule:
+    flex: int
+    num_ops: int
+    op_index: int
+    # (op, index, value) of every op, see MDLFlexOp
+    ops: List[Tuple[int, int, float]]
+
+    # mstudioflexrule_t
+    _layout = Layout(('flex', 'i'), ('num_ops', 'i'), ('op_index', 'i'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        self._layout.assign(self, self._layout.unpack(buf, offset))
+        self.ops = buf.array(_flex_op_dtype, offset + self.op_index, self.num_ops).tolist()
+
+
 class MDLBodyPart:
     num_models: int
+    base: int
     model_index: int
 
     name: str
     models: List[MDLModel]
 
-    def __init__(self, buf: BufferedReader):
-        start = buf.tell()
-        (name_index, self.num_models, _, self.model_index) = \
-            _struct_unpack('=iiii', buf)
-        end = buf.tell()
-        self.name = _read_strings(buf, start + name_index)[0]
-        buf.seek(start + self.model_index)
-        self.models = list(map(MDLModel, [buf]*self.num_models))
-        buf.seek(end)
+    # mstudiobodyparts_t
+    _layout = Layout(('_name_index', 'i'), ('num_models', 'i'), ('base', 'i'), ('model_index', 'i'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        values = self._layout.unpack(buf, offset)
+        self._layout.assign(self, values)
+        self.name = buf.string(offset + values[0])
+        self.models = [
+            MDLModel(buf, offset + self.model_index + i * MDLModel._size) for i in range(self.num_models)
+        ]
 
     def __str__(self) -> str:
         return self.name
 
 
+# mstudiobone_t
+MDL_BONE_DTYPE = np.dtype([
+    ('name_index', '<i4'),
+    ('parent', '<i4'),
+    ('bone_controller', '<i4', (6,)),
+    ('pos', '<f4', (3,)),
+    ('quat', '<f4', (4,)),
+    ('rot', '<f4', (3,)),
+    ('posscale', '<f4', (3,)),
+    ('rotscale', '<f4', (3,)),
+    ('pose_to_bone', '<f4', (3, 4)),
+    ('q_alignment', '<f4', (4,)),
+    ('flags', '<i4'),
+    ('proctype', '<i4'),
+    ('procindex', '<i4'),
+    ('physics_bone', '<i4'),
+    ('surface_prop_index', '<i4'),
+    ('contents', '<i4'),
+    ('unused', '<i4', (8,)),
+])
+
+
+class MDLBoneTable:
+    # every bone as one contiguous array per field, indexed by bone id
+    names: List[str]
+    index: Dict[str, int]  # name -> bone id
+    parent_ids: np.ndarray
+    bone_controller: np.ndarray  # (n, 6)
+    pos: np.ndarray  # (n, 3)
+    quat: np.ndarray  # (n, 4)
+    rot: np.ndarray  # (n, 3)
+    posscale: np.ndarray  # (n, 3)
+    rotscale: np.ndarray  # (n, 3)
+    pose_to_bone: np.ndarray  # (n, 3, 4)
+    q_alignment: np.ndarray  # (n, 4)
+    flags: np.ndarray
+    proctype: np.ndarray
+    procindex: np.ndarray
+    physics_bone: np.ndarray
+    surface_prop_index: np.ndarray
+    contents: np.ndarray
+
+    def __init__(self, buf: Reader, offset: int, num: int):
+        records = buf.array(MDL_BONE_DTYPE, offset, num)
+        self.names = [
+            buf.string(offset + i * MDL_BONE_DTYPE.itemsize + name_index)
+            for i, name_index in enumerate(records['name_index'].tolist())
+        ]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.parent_ids = np.ascontiguousarray(records['parent'])
+        for field in (
+            'bone_controller', 'pos', 'quat', 'rot', 'posscale', 'rotscale', 'pose_to_bone', 'q_alignment',
+            'flags', 'proctype', 'procindex', 'physics_bone', 'surface_prop_index', 'contents',
+        ):
+            setattr(self, field, np.ascontiguousarray(records[field]))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
 class MDLBone:
+    # a view of one row of MDLBoneTable
     id: int
-    name: str
-    parent_id: int
     parent: 'MDLBone'
     children: List['MDLBone']
-    bone_controller: List[int]
-    pos: Vector3
-    quat: Vector4
-    rot: Vector3
-    posscale: Vector3
-    rotscale: Vector3
-    pose_to_bone: Matrix3x4
-    q_alignment: Vector4
-    flags: int
-    proctype: int
-    procindex: int
-    physics_bone: int
-    surface_prop_index: int
-    contents: int
-    # unused 32 bytes
+    table: MDLBoneTable
+
+    __slots__ = ('id', 'parent', 'children', 'table')
 
-    def __init__(self, id: int, buf: BufferedReader):
+    def __init__(self, table: MDLBoneTable, id: int):
+        self.table = table
         self.id = id
-        start = buf.tell()
-        (name_index, self.parent_id) = _struct_unpack('=ii', buf)
-        self.name = _read_strings(buf, start + name_index)[0]
-        self.bone_controller = list(_struct_unpack('=iiiiii', buf))
-        self.pos = _struct_unpack('=fff', buf)
-        self.quat = _struct_unpack('=ffff', buf)
-        self.rot = _struct_unpack('=fff', buf)
-        self.posscale = _struct_unpack('=fff', buf)
-        self.rotscale = _struct_unpack('=fff', buf)
-        self.pose_to_bone = (
-            _struct_unpack('=ffff', buf),
-            _struct_unpack('=ffff', buf),
-            _struct_unpack('=ffff', buf),
-        )
-        self.q_alignment = _struct_unpack('=ffff', buf)
-        (self.flags, self.proctype, self.procindex, self.physics_bone,
-         self.surface_prop_index, self.contents) \
-            = _struct_unpack('=iiiiii', buf)
         self.children = []
-        buf.seek(32, 1)
+
+    @property
+    def name(self) -> str:
+        return self.table.names[self.id]
+
+    @property
+    def parent_id(self) -> int:
+        return int(self.table.parent_ids[self.id])
+
+    @property
+    def bone_controller(self) -> List[int]:
+        return self.table.bone_controller[self.id].tolist()
+
+    @property
+    def pos(self) -> Vector3:
+        return tuple(self.table.pos[self.id].tolist())
+
+    @property
+    def quat(self) -> Vector4:
+        return tuple(self.table.quat[self.id].tolist())
+
+    @property
+    def rot(self) -> Vector3:
+        return tuple(self.table.rot[self.id].tolist())
+
+    @property
+    def posscale(self) -> Vector3:
+        return tuple(self.table.posscale[self.id].tolist())
+
+    @property
+    def rotscale(self) -> Vector3:
+        return tuple(self.table.rotscale[self.id].tolist())
+
+    @property
+    def pose_to_bone(self) -> Matrix3x4:
+        return tuple(tuple(row) for row in self.table.pose_to_bone[self.id].tolist())
+
+    @property
+    def q_alignment(self) -> Vector4:
+        return tuple(self.table.q_alignment[self.id].tolist())
+
+    @property
+    def flags(self) -> int:
+        return int(self.table.flags[self.id])
+
+    @property
+    def proctype(self) -> int:
+        return int(self.table.proctype[self.id])
+
+    @property
+    def procindex(self) -> int:
+        return int(self.table.procindex[self.id])
+
+    @property
+    def physics_bone(self) -> int:
+        return int(self.table.physics_bone[self.id])
+
+    @property
+    def surface_prop_index(self) -> int:
+        return int(self.table.surface_prop_index[self.id])
+
+    @property
+    def contents(self) -> int:
+        return int(self.table.contents[self.id])
 
     def __str__(self) -> str:
         return self.name
@@ -176,116 +379,136 @@ class MDLMovement:
     vector: Vector3
     position: Vector3
 
-    def __init__(self, buf: BufferedReader):
-        (self.end_frame, self.motion_frags, self.v0, self.v1, self.angle) = _struct_unpack('=iifff', buf)
-        self.vector = _struct_unpack('=fff', buf)
-        self.position = _struct_unpack('=fff', buf)
+    # mstudiomovement_t
+    _layout = Layout(
+        ('end_frame', 'i'), ('motion_frags', 'i'), ('v0', 'f'), ('v1', 'f'), ('angle', 'f'),
+        ('vector', '3f'), ('position', '3f'),
+    )
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        self._layout.assign(self, self._layout.unpack(buf, offset))
 
 
 class MDLAnimBlock:
     data_start: int
     data_end: int
 
-    def __init__(self, buf: BufferedReader):
-        (self.data_start, self.data_end) = _struct_unpack('=ii', buf)
-
-
-class MDLAnimValue:
-    valid: int
-    total: int
-    values: List[int]
-    next: Optional['MDLAnimValue']
-
-    def __init__(self, buf: BufferedReader, frames_remaining: int):
-        (self.valid, self.total) = _struct_unpack('=BB', buf)
-        for _ in range(self.valid):
-            self.values.append(_struct_unpack('=h', buf)[0])
-        if frames_remaining > 0:
-            self.next = MDLAnimValue(buf, frames_remaining - self.total)
+    # mstudioanimblock_t
+    _layout = Layout(('data_start', 'i'), ('data_end', 'i'))
+    _size = _layout.size
 
-
-AnimValues = Tuple[MDLAnimValue, MDLAnimValue, MDLAnimValue]
+    def __init__(self, buf: Reader, offset: int):
+        self._layout.assign(self, self._layout.unpack(buf, offset))
 
 
 class MDLAnimValuePtr:
     offsets: Tuple[int, int, int]
 
-    def __init__(self, buf: BufferedReader):
-        self.offsets = _struct_unpack('=hhh', buf)
+    # mstudioanim_valueptr_t
+    _layout = Layout(('offsets', '3h'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        self._layout.assign(self, self._layout.unpack(buf, offset))
+
+
+_anim_value_dtype = np.dtype('<i2')
+
+
+def _expand_anim_value(buf: Reader, offset: int, frames: int) -> np.ndarray:
+    # mstudioanimvalue_t is a run-length encoded stream of shorts. each run
+    # is a (valid, total) header followed by `valid` values, which covers
+    # `total` frames by holding its last value.
+    data = buf.data
+    heads: List[int] = []
+    valids: List[int] = []
+    totals: List[int] = []
+    slot = 0
+    frame = 0
+    while frame < frames:
+        valid = data[offset + slot * 2]
+        total = data[offset + slot * 2 + 1]
+        if valid == 0 or total == 0:
+            raise Exception('broken animation value')
+        heads.append(slot)
+        valids.append(valid)
+        totals.append(total)
+        frame += total
+        slot += valid + 1
+    stream = buf.array(_anim_value_dtype, offset, slot)
+    run = np.repeat(np.arange(len(totals)), totals)[:frames]
+    local = np.arange(frames) - (np.cumsum(totals) - totals)[run]
+    return stream[np.array(heads)[run] + 1 + np.minimum(local, np.array(valids)[run] - 1)]
+
+
+def _read_anim_values(buf: Reader, offset: int, frames: int, scale: Vector3) -> np.ndarray:
+    values = np.zeros((frames, 3), np.float32)
+    if frames > 0:
+        for axis, ptr in enumerate(MDLAnimValuePtr(buf, offset).offsets):
+            if ptr != 0:
+                values[:, axis] = _expand_anim_value(buf, offset + ptr, frames)
+    values *= np.array(scale, np.float32)
+    return values
 
 
 class MDLAnim:
     bone: int
     flags: MDLAnimFlag
-    next: Optional['MDLAnim']
+    next: Optional['MDLAnim'] = None
 
-    ptr_rot: Optional[AnimValues] = None
-    ptr_pos: Optional[AnimValues] = None
     raw_rot: Optional[Vector4] = None
     raw_pos: Optional[Vector3] = None
+    # (frames, 3) arrays, already multiplied by MDLBone.rotscale/posscale
+    rot_values: Optional[np.ndarray] = None
+    pos_values: Optional[np.ndarray] = None
+
+    # mstudioanim_t
+    _layout = Layout(('bone', 'B'), ('flags', 'B'), ('next_offset', 'h'))
 
-    def __init__(self, buf: BufferedReader, frames: int):
-        start = buf.tell()
-        (self.bone, flags, next_index) = _struct_unpack('=BBh', buf)
+    def __init__(self, buf: Reader, offset: int, frames: int, bones: MDLBoneTable):
+        (self.bone, flags, next_index) = self._layout.unpack(buf, offset)
         self.flags = MDLAnimFlag(flags)
         if self.bone == 255:
             # TODO: implement
             return
-        self._read_data(buf, frames)
-        end = buf.tell()
+        self._read_data(buf, offset + self._layout.size, frames, bones)
         if next_index != 0:
-            buf.seek(start + next_index)
-            next = MDLAnim(buf, frames)
+            next = MDLAnim(buf, offset + next_index, frames, bones)
             if next.bone != 255:
                 self.next = next
-            buf.seek(end)
-        else:
-            self.next = None
 
-    def _read_data(self, buf: BufferedReader, frames: int):
-        raw = False
+    def _read_data(self, buf: Reader, offset: int, frames: int, bones: MDLBoneTable):
         if self.flags & MDLAnimFlag.STUDIO_ANIM_RAWROT:
-            self.raw_rot = compressed.quat48(buf)
-            raw = True
+            self.raw_rot = compressed.quat48(buf.read(offset, 6))
+            offset += 6
         elif self.flags & MDLAnimFlag.STUDIO_ANIM_RAWROT2:
-            self.raw_rot = compressed.quat64(buf)
-            raw = True
+            self.raw_rot = compressed.quat64(buf.read(offset, 8))
+            offset += 8
+        elif self.flags & MDLAnimFlag.STUDIO_ANIM_ANIMROT:
+            self.rot_values = _read_anim_values(buf, offset, frames, bones.rotscale[self.bone])
+            offset += MDLAnimValuePtr._size
 
         if self.flags & MDLAnimFlag.STUDIO_ANIM_RAWPOS:
-            self.raw_pos = compressed.vec48(buf)
-            raw = True
-        if raw:
-            return
-
-        if self.flags & MDLAnimFlag.STUDIO_ANIM_ANIMROT:
-            rotp = MDLAnimValuePtr(buf)
-        if self.flags & MDLAnimFlag.STUDIO_ANIM_ANIMPOS:
-            posp = MDLAnimValuePtr(buf)
-        if rotp:
-            self.ptr_rot = self._read_three_values(buf, rotp, frames)
-        if posp:
-            self.ptr_pos = self._read_three_values(buf, posp, frames)
-
-    def _read_three_values(self, buf: BufferedReader, ptrs: MDLAnimValuePtr, frames: int) -> AnimValues:
-        start = buf.tell()
-        reuslt: List[MDLAnimValue] = []
-        for ptr in ptrs.offsets:
-            buf.seek(ptr, 1)
-            reuslt.append(MDLAnimValue(buf, frames))
-        buf.seek(start)
-        return (reuslt[0], reuslt[1], reuslt[2])
-
-    def _read_value_ptr(self, buf: BufferedReader) -> Tuple[int, int, int]:
-        start = buf.tell()
-        return tuple(p + start for p in _struct_unpack('=iii', buf))
+            self.raw_pos = compressed.vec48(buf.read(offset, 6))
+        elif self.flags & MDLAnimFlag.STUDIO_ANIM_ANIMPOS:
+            self.pos_values = _read_anim_values(buf, offset, frames, bones.posscale[self.bone])
 
 
 class MDLAnimSections:
     anim_block: int
     anim_index: int
 
-    def __init__(self, buf: BufferedReader):
-        (self.anim_block, self.anim_index) = _struct_unpack('=ii', buf)
+    # mstudioanimsections_t
+    _layout = Layout(('anim_block', 'i'), ('anim_index', 'i'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        self._layout.assign(self, self._layout.unpack(buf, offset))
+
+
+# guards the bookkeeping of the section caches of every MDLAnimDesc, never held while decoding
+_section_lock = threading.Lock()
 
 
 class MDLAnimDesc:
@@ -313,57 +536,192 @@ class MDLAnimDesc:
 
     movements: List[MDLMovement]
     sections: List[MDLAnimSections]
-    anims: List[Optional[MDLAnim]]
-
-    def __init__(self, buf: BufferedReader):
-        start = buf.tell()
-        (self.baseptr, name_off, self.fps, flags, self.num_frames, self.num_movement,
-         self.movement_index) = _struct_unpack('=iifiiii', buf)
-        self.flags = MDLAnimDescFlag(flags)
-        self.name = _read_strings(buf, start + name_off)[0]
-        print(self.name)
-        buf.seek(24, 1)
-        (self.anim_block, self.anim_index, self.num_ikrule, self.ikrule_index,
-         self.animblock_ikrule_index, self.num_local_hierarchy, self.local_hierarchy_index,
-         section_index, self.section_frames, self.zero_frame_span, self.zero_frame_count,
-         self.zero_frame_index, self.zero_frames_tall_time) = _struct_unpack('=iiiiiiiiihhif', buf)
-        end = buf.tell()
-        self.anims = [None]
+
+    # sections are decoded on first use and the most recently used ones are kept,
+    # so sampling a frame of a long clip costs the same as sampling a short one
+    section_cache_size: int = 8
+
+    _buf: Reader
+    _offset: int
+    _bones: MDLBoneTable
+    _ani: Optional[ANI]
+    _instrument: Optional[Instrument]
+    _decoded: 'OrderedDict[int, Optional[MDLAnim]]'
+    # mstudioanimdesc_t
+    _layout = Layout(
+        ('baseptr', 'i'), ('_name_index', 'i'), ('fps', 'f'), ('flags', 'i'), ('num_frames', 'i'),
+        ('num_movement', 'i'), ('movement_index', 'i'), ('_unused', '24x'),
+        ('anim_block', 'i'), ('anim_index', 'i'), ('num_ikrule', 'i'), ('ikrule_index', 'i'),
+        ('animblock_ikrule_index', 'i'), ('num_local_hierarchy', 'i'), ('local_hierarchy_index', 'i'),
+        ('section_index', 'i'), ('section_frames', 'i'), ('zero_frame_span', 'h'), ('zero_frame_count', 'h'),
+        ('zero_frame_index', 'i'), ('zero_frames_tall_time', 'f'),
+    )
+    _size = _layout.size
+
+    def __init__(
+        self,
+        buf: Reader,
+        offset: int,
+        bones: MDLBoneTable,
+        ani: Optional[ANI] = None,
+        instrument: Optional[Instrument] = None,
+    ):
+        (self._buf, self._offset, self._bones, self._ani, self._instrument) = (buf, offset, bones, ani, instrument)
+        self._decoded = OrderedDict()
+        values = self._layout.unpack(buf, offset)
+        self._layout.assign(self, values)
+        self.flags = MDLAnimDescFlag(self.flags)
+        self.name = buf.string(offset + values[1])
 
         # Movement
-        buf.seek(start + self.movement_index)
-        self.movements = list(map(MDLMovement, [buf] * self.num_movement))
+        self.movements = MDLMovement._layout.records(
+            MDLMovement, buf, offset + self.movement_index, self.num_movement)
 
         # Section
-        if self.section_frames > 0 and section_index != 0:
-            buf.seek(start + section_index)
+        if self.section_frames > 0 and self.section_index != 0:
             section_num = (self.num_frames // self.section_frames + 2)
-            self.sections = list(map(MDLAnimSections, [buf] * section_num))
-            self.anims = [None] * section_num
+            self.sections = MDLAnimSections._layout.records(
+                MDLAnimSections, buf, offset + self.section_index, section_num)
         else:
             self.sections = []
 
-        # Animation
+    @property
+    def num_sections(self) -> int:
+        return max(len(self.sections), 1)
+
+    @property
+    def anims(self) -> List[Optional[MDLAnim]]:
+        # the first MDLAnim of every section, None for sections without data
+        # (in an animation block when the model has no ani)
+        return [self.section_anim(i) for i in range(self.num_sections)]
+
+    def section_anim(self, section: int) -> Optional[MDLAnim]:
+        decoded = self._decoded
+        with _section_lock:
+            if section in decoded:
+                decoded.move_to_end(section)
+                return decoded[section]
+        # decoded without the lock, two threads missing the same section both decode it
+        anim = self._decode_section(section)
+        with _section_lock:
+            decoded[section] = anim
+            if len(decoded) > self.section_cache_size:
+                decoded.popitem(last=False)
+        return anim
+
+    def _decode_section(self, section: int) -> Optional[MDLAnim]:
         if self.sections:
-            for i, section in enumerate(self.sections):
-                if section.anim_block == 0:
-                    offset = section.anim_index + self.anim_index - self.sections[0].anim_index
-                    section_frames = self.section_frames
-                    if i >= self.section_frames - 1:  # if not last
-                        section_frames = self.num_frames - (len(self.sections) - 2) * section_frames
-                    buf.seek(start + offset)
-                    self._read_anim(buf, section_frames, i)
+            (block, anim_index) = (self.sections[section].anim_block, self.sections[section].anim_index)
+            num_frames = self._section_frame_count(section)
+            if block == 0:
+                anim_index += self.anim_index - self.sections[0].anim_index
         # anim block
         # https://github.com/ZeqMacaw/Crowbar/blob/master/Crowbar/Core/GameModel/SourceModel44/SourceMdlFile44.vb#L1070
-        elif self.anim_block == 0:
-            buf.seek(start + self.anim_index)
-            self._read_anim(buf, self.num_frames, 0)
-        buf.seek(end)
+        else:
+            (block, anim_index, num_frames) = (self.anim_block, self.anim_index, self.num_frames)
+        # like mstudioanimdesc_t::pAnimBlock, data of block 0 is in the mdl, relative to the desc,
+        # and data of the others relative to the start of the block in the ani
+        if block == 0:
+            (buf, offset) = (self._buf, self._offset + anim_index)
+        elif block > 0 and self._ani is not None:
+            (buf, offset) = (self._ani.block(block), anim_index)
+        else:
+            return None
+        with measure(self._instrument, 'mdl', 'anim_section', buf):
+            anim = MDLAnim(buf, offset, num_frames, self._bones)
+        return anim if anim.bone < 255 else None
+
+    def _section_frame_count(self, section: int) -> int:
+        # the last frame of a long animation is stored alone in the last section
+        if section == len(self.sections) - 1:
+            return 1
+        frames = self.num_frames - 1 if self.num_frames > self.section_frames else self.num_frames
+        return max(0, min(self.section_frames, frames - section * self.section_frames))
+
+    def _frame_sections(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # section and frame in the section of each frame
+        if not self.sections:
+            return np.zeros_like(frames), frames
+        sections = frames // self.section_frames
+        local = frames - sections * self.section_frames
+        if self.num_frames > self.section_frames:
+            last = frames == self.num_frames - 1
+            sections[last] = len(self.sections) - 1
+            local[last] = 0
+        return sections, local
+
+    def local_pose(self, frames: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # bone positions (frames, bones, 3) and quaternions (frames, bones, 4)
+        # in parent space, like CalcAnimation of the engine
+        bones = self._bones
+        frames = np.arange(self.num_frames) if frames is None else np.asarray(frames, np.int64).reshape(-1)
+        if np.any((frames < 0) | (frames >= self.num_frames)):
+            raise ValueError('frame out of range')
+        shape = (len(frames), len(bones))
+        if self.flags & MDLAnimDescFlag.STUDIO_DELTA:
+            pos = np.zeros(shape + (3,))
+            quat = np.zeros(shape + (4,))
+            quat[..., 3] = 1.0
+        else:
+            pos = np.empty(shape + (3,))
+            pos[:] = bones.pos
+            quat = np.empty(shape + (4,))
+            quat[:] = bones.quat
+        angles = np.zeros(shape + (3,))
+        animated = np.zeros(shape, bool)
+
+        sections, local = self._frame_sections(frames)
+        for section in np.unique(sections).tolist():
+            anim = self.section_anim(section)
+            rows = np.flatnonzero(sections == section)
+            index = local[rows]
+            while anim is not None:
+                bone = anim.bone
+                delta = anim.flags & MDLAnimFlag.STUDIO_ANIM_DELTA
+                if anim.raw_rot is not None:
+                    quat[rows, anim.bone] = anim.raw_rot
+                elif anim.rot_values is not None:
+                    angles[rows, anim.bone] = anim.rot_values[index]
+                    if not delta:
+                        angles[rows, anim.bone] += bones.rot[bone]
+                    animated[rows, anim.bone] = True
+                else:
+                    quat[rows, anim.bone] = (0.0, 0.0, 0.0, 1.0) if delta else bones.quat[bone]
+                if anim.raw_pos is not None:
+                    pos[rows, anim.bone] = anim.raw_pos
+                elif anim.pos_values is not None:
+                    pos[rows, anim.bone] = anim.pos_values[index]
+                    if not delta:
+                        pos[rows, anim.bone] += bones.pos[bone]
+                else:
+                    pos[rows, anim.bone] = (0.0, 0.0, 0.0) if delta else bones.pos[bone]
+                anim = anim.next
+        quat[animated] = angle_quaternion(angles[animated])
+        return pos, quat
+
+    def sample(self, frames: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        # local_pose at fractional frames, blended between the two frames around each one
+        # like the engine does. only the sections of those frames are decoded
+        frames = np.asarray(frames, np.float64).reshape(-1)
+        if np.any((frames < 0) | (frames > self.num_frames - 1)):
+            raise ValueError('frame out of range')
+        first = np.floor(frames).astype(np.int64)
+        second = np.minimum(first + 1, self.num_frames - 1)
+        pos, quat = self.local_pose(np.concatenate([first, second]))
+        s = (frames - first)[:, None, None]
+        n = len(frames)
+        return (
+            pos[:n] * (1.0 - s) + pos[n:] * s,
+            quaternion_blend(quat[:n], quat[n:], s),
+        )
 
-    def _read_anim(self, buf: BufferedReader, num_frames: int, section_index: int):
-        anim = MDLAnim(buf, num_frames)
-        if anim.bone < 255:
-            self.anims[section_index] = anim
+    def sample_time(self, seconds: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        # sample at times since the start, wrapping looping animations and holding the last frame of the others
+        last = self.num_frames - 1
+        frames = np.asarray(seconds, np.float64).reshape(-1) * self.fps
+        if self.flags & MDLAnimDescFlag.STUDIO_LOOPING and last > 0:
+            frames = np.mod(frames, last)
+        return self.sample(np.clip(frames, 0, max(last, 0)))
 
     def __str__(self) -> str:
         return self.name
@@ -411,35 +769,176 @@ class MDLSeqDesc:
     # unused 28 bytes
     anims: List[List[int]]
 
-    def __init__(self, buf: BufferedReader):
-        start = buf.tell()
-        (self.baseptr, labeloff, anoff) = _struct_unpack('=iii', buf)
-        self.label = _read_strings(buf, start + labeloff)[0]
-        self.activity_name = _read_strings(buf, start + anoff)[0]
-        (self.flags, self.activity, self.actweight, self.num_events, self.event_index) \
-            = _struct_unpack('=iiiii', buf)
-        self.bbmin = _struct_unpack('=fff', buf)
-        self.bbmax = _struct_unpack('=fff', buf)
-        (self.num_blends, self.anim_index_index, self.movement_index) = _struct_unpack('=iii', buf)
-        self.group_size = _struct_unpack('=ii', buf)
-        self.param_index = _struct_unpack('=ii', buf)
-        self.param_start = _struct_unpack('=ff', buf)
-        self.param_end = _struct_unpack('=ff', buf)
-        (self.param_parent, self.fade_in_time, self.fade_out_time, self.local_entry_node,
-         self.local_exit_node, self.node_flags, self.entry_phase, self.exit_phase, self.last_frame,
-         self.next_seq, self.pose, self.num_ik_rules, self.num_auto_layers, self.auto_layer_index,
-         self.weight_list_index, self.pose_key_index, self.num_ik_locks, self.ik_lock_index,
-         self.keyvalue_index, self.keyvalue_size, self.cycle_pose_index) \
-            = _struct_unpack('=iffiiifffiiiiiiiiiiii', buf)
-        end = buf.seek(28, 1)
-        buf.seek(start + self.anim_index_index)
-        self.anims = [list(_struct_unpack('=' + 'h' * self.group_size[0], buf)) for _ in range(self.group_size[1])]
-        buf.seek(end)
+    # mstudioseqdesc_t
+    _layout = Layout(
+        ('baseptr', 'i'), ('_label_index', 'i'), ('_activity_name_index', 'i'),
+        ('flags', 'i'), ('activity', 'i'), ('actweight', 'i'), ('num_events', 'i'), ('event_index', 'i'),
+        ('bbmin', '3f'), ('bbmax', '3f'), ('num_blends', 'i'), ('anim_index_index', 'i'), ('movement_index', 'i'),
+        ('group_size', '2i'), ('param_index', '2i'), ('param_start', '2f'), ('param_end', '2f'),
+        ('param_parent', 'i'), ('fade_in_time', 'f'), ('fade_out_time', 'f'),
+        ('local_entry_node', 'i'), ('local_exit_node', 'i'), ('node_flags', 'i'),
+        ('entry_phase', 'f'), ('exit_phase', 'f'), ('last_frame', 'f'), ('next_seq', 'i'), ('pose', 'i'),
+        ('num_ik_rules', 'i'), ('num_auto_layers', 'i'), ('auto_layer_index', 'i'), ('weight_list_index', 'i'),
+        ('pose_key_index', 'i'), ('num_ik_locks', 'i'), ('ik_lock_index', 'i'),
+        ('keyvalue_index', 'i'), ('keyvalue_size', 'i'), ('cycle_pose_index', 'i'), ('_unused', '28x'),
+    )
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        values = self._layout.unpack(buf, offset)
+        self._layout.assign(self, values)
+        self.label = buf.string(offset + values[1])
+        self.activity_name = buf.string(offset + values[2])
+        (width, height) = self.group_size
+        table = buf.unpack('=%dh' % (width * height), offset + self.anim_index_index)
+        self.anims = [list(table[i * width:(i + 1) * width]) for i in range(height)]
 
     def __str__(self) -> str:
         return self.label
 
 
+class MDLHeader(NamedTuple):
+    id: int
+    version: int
+    checksum: int
+    name: str
+    length: int
+    eye_position: Vector3
+    illum_position: Vector3
+    hull_min: Vector3
+    hull_max: Vector3
+    view_bbmin: Vector3
+    view_bbmax: Vector3
+    flags: MDLFlag
+    num_bones: int
+    bone_index: int
+    num_bone_controllers: int
+    bone_controller_index: int
+    num_hitbox_sets: int
+    hitbox_set_index: int
+    num_local_anim: int
+    local_anim_index: int
+    num_local_seq: int
+    local_seq_index: int
+    activity_list_version: int
+    events_indexed: int
+    num_textures: int
+    texture_index: int
+    num_cd_textures: int
+    cd_texture_index: int
+    num_skin_ref: int
+    num_skin_families: int
+    skin_index: int
+    num_bodyparts: int
+    bodypart_index: int
+    num_local_attachments: int
+    local_attachment_index: int
+    num_local_nodes: int
+    local_node_index: int
+    local_node_name_index: int
+    num_flex_desc: int
+    flex_desc_index: int
+    num_flex_controllers: int
+    flex_controller_index: int
+    num_flex_rules: int
+    flex_rule_index: int
+    num_ik_chains: int
+    ik_chain_index: int
+    num_mouths: int
+    mouth_index: int
+    num_local_pose_parameters: int
+    local_pose_param_index: int
+    surface_prop_index: int
+    keyvalue_index: int
+    keyvalue_size: int
+    num_local_ik_autoplay_locks: int
+    local_ik_autoplay_lock_index: int
+    mass: float
+    contents: int
+    num_include_models: int
+    include_model_index: int
+    virtual_model: int
+    anim_block_name_index: int
+    num_anim_blocks: int
+    anim_block_index: int
+    anim_block_model: int
+    bone_table_by_name_index: int
+    vertex_base: int
+    index_base: int
+    const_directional_light_dot: int
+    root_lod: int
+    num_allowed_root_lods: int
+    num_flex_controller_ui: int
+    flex_controller_ui_index: int
+    vert_anim_fixed_point_scale: float
+    studiohdr2_index: int
+
+
+# studiohdr_t
+_mdl_header = Layout(
+    ('id', 'I'), ('version', 'I'), ('checksum', 'I'), ('name', '64s'), ('length', 'i'),
+    ('eye_position', '3f'), ('illum_position', '3f'), ('hull_min', '3f'), ('hull_max', '3f'),
+    ('view_bbmin', '3f'), ('view_bbmax', '3f'), ('flags', 'I'),
+    ('num_bones', 'i'), ('bone_index', 'i'), ('num_bone_controllers', 'i'), ('bone_controller_index', 'i'),
+    ('num_hitbox_sets', 'i'), ('hitbox_set_index', 'i'), ('num_local_anim', 'i'), ('local_anim_index', 'i'),
+    ('num_local_seq', 'i'), ('local_seq_index', 'i'), ('activity_list_version', 'i'), ('events_indexed', 'i'),
+    ('num_textures', 'i'), ('texture_index', 'i'), ('num_cd_textures', 'i'), ('cd_texture_index', 'i'),
+    ('num_skin_ref', 'i'), ('num_skin_families', 'i'), ('skin_index', 'i'),
+    ('num_bodyparts', 'i'), ('bodypart_index', 'i'),
+    ('num_local_attachments', 'i'), ('local_attachment_index', 'i'),
+    ('num_local_nodes', 'i'), ('local_node_index', 'i'), ('local_node_name_index', 'i'),
+    ('num_flex_desc', 'i'), ('flex_desc_index', 'i'), ('num_flex_controllers', 'i'), ('flex_controller_index', 'i'),
+    ('num_flex_rules', 'i'), ('flex_rule_index', 'i'), ('num_ik_chains', 'i'), ('ik_chain_index', 'i'),
+    ('num_mouths', 'i'), ('mouth_index', 'i'), ('num_local_pose_parameters', 'i'), ('local_pose_param_index', 'i'),
+    ('surface_prop_index', 'i'), ('keyvalue_index', 'i'), ('keyvalue_size', 'i'),
+    ('num_local_ik_autoplay_locks', 'i'), ('local_ik_autoplay_lock_index', 'i'),
+    ('mass', 'f'), ('contents', 'i'), ('num_include_models', 'i'), ('include_model_index', 'i'),
+    ('virtual_model', 'i'), ('anim_block_name_index', 'i'), ('num_anim_blocks', 'i'), ('anim_block_index', 'i'),
+    ('anim_block_model', 'i'), ('bone_table_by_name_index', 'i'), ('vertex_base', 'i'), ('index_base', 'i'),
+    ('const_directional_light_dot', 'B'), ('root_lod', 'B'), ('num_allowed_root_lods', 'B'), ('_unused', '1x'),
+    ('_unused4', '4x'), ('num_flex_controller_ui', 'i'), ('flex_controller_ui_index', 'i'),
+    ('vert_anim_fixed_point_scale', 'f'), ('_unused3', '4x'), ('studiohdr2_index', 'i'), ('_unused2', '4x'),
+)
+
+
+def _unpack_header(buf: Reader) -> MDLHeader:
+    values = list(_mdl_header.unpack(buf, 0))
+    if values[0] != 0x54534449:
+        raise Exception('this is not mdl file')
+    values[3] = values[3].split(b'\0', 1)[0].decode()
+    values[11] = MDLFlag(values[11])
+    return MDLHeader(*values)
+
+
+def probe_mdl(src: Source) -> MDLHeader:
+    return _unpack_header(Reader(_read_head(src, _mdl_header.size)))
+
+
+class _table:
+    # a lazily parsed table of MDL, measured when the MDL is instrumented. like cached_property
+    # the value is stored in the instance dict, so later lookups never get here, but threads
+    # asking for a table at the same time wait for one parse of it instead of racing
+    def __init__(self, func: Callable[[Any], Any]):
+        self.func = func
+        self.name = func.__name__
+        functools.update_wrapper(self, func)  # type: ignore
+
+    def __get__(self, mdl: Optional['MDL'], owner: Optional[type] = None) -> Any:
+        if mdl is None:
+            return self
+        values = mdl.__dict__
+        if self.name in values:
+            return values[self.name]
+        with mdl._locks.setdefault(self.name, threading.Lock()):
+            if self.name not in values:
+                if mdl._instrument is None:
+                    values[self.name] = self.func(mdl)
+                else:
+                    with mdl._instrument.measure('mdl', self.name, mdl._buf):
+                        values[self.name] = self.func(mdl)
+        return values[self.name]
+
+
 class MDL:
     version: int
     checksum: int
@@ -448,78 +947,139 @@ class MDL:
     flags: MDLFlag
     # skipped many entries
 
-    bones: List[MDLBone]
-    root_bone: MDLBone
-    anim_descs: List[MDLAnimDesc]
-    seq_descs: List[MDLSeqDesc]
-    textures: List[MDLTexture]
-    skins: List[List[MDLTexture]]
-    bodyparts: List[MDLBodyPart]
-    anim_block_name: str
-    anim_blocks: List[MDLAnimBlock]
-
-    def __init__(self, buf: BufferedReader):
-        (id, self.version, self.checksum) = _struct_unpack('=III', buf)
-        if id != 0x54534449:
-            raise Exception('this is not mdl file')
-        self.name = _read_name64(buf)
-        buf.seek(76, 1)
-        self.flags = MDLFlag(_struct_unpack('=I', buf)[0])
-        # bone
-        (num, off) = _struct_unpack('=ii', buf)
-        home = buf.tell()
-        buf.seek(off)
-        self.bones = list(map(lambda arg: MDLBone(arg[0], arg[1]), enumerate([buf]*num)))
-        buf.seek(home + 16)
-        # animdesc
-        (num, off) = _struct_unpack('=ii', buf)
-        home = buf.tell()
-        buf.seek(off)
-        self.anim_descs = list(map(MDLAnimDesc, [buf]*num))
-        buf.seek(home)
-        # seqdesc
-        (num, off) = _struct_unpack('=ii', buf)
-        home = buf.tell()
-        buf.seek(off)
-        self.seq_descs = list(map(MDLSeqDesc, [buf]*num))
-        buf.seek(home + 8)
-        # texture
-        (num, off) = _struct_unpack('=ii', buf)
-        home = buf.tell()
-        buf.seek(off)
-        self.textures = list(map(MDLTexture, [buf]*num))
-        buf.seek(home + 8)
-        # skins
-        (num, fnum, off) = _struct_unpack('=iii', buf)
-        home = buf.tell()
-        buf.seek(off)
-        self.skins = [
-            [self.textures[_struct_unpack('=h', buf)[0]]
-             for _ in range(num)] for _ in range(fnum)
+    header: MDLHeader
+
+    _buf: Reader
+    _instrument: Optional[Instrument]
+    _ani_src: Optional[Source]
+    _locks: Dict[str, threading.Lock]
+    _root_bone: MDLBone
+    _tables = (
+        'bone_table', 'bones', 'anim_descs', 'seq_descs', 'textures', 'skins',
+        'bodyparts', 'anim_block_name', 'anim_blocks', 'flex_descs', 'flex_controllers', 'flex_rules',
+    )
+
+    def __init__(
+        self,
+        src: Source,
+        lazy: bool = False,
+        instrument: Optional[Instrument] = None,
+        ani: Optional[Source] = None,
+    ):
+        # `ani` is the .ani file holding the animation blocks, if the model has any
+        buf = Reader(src) if instrument is None else instrument.reader(src)
+        with measure(instrument, 'mdl', 'header', buf):
+            self.header = header = _unpack_header(buf)
+        (self.version, self.checksum, self.name, self.flags) = \
+            (header.version, header.checksum, header.name, header.flags)
+        self._buf = buf
+        self._instrument = instrument
+        self._ani_src = ani
+        self._locks = {}
+        if not lazy:
+            self.load()
+
+    def load(self, executor: Optional[Executor] = None):
+        # parse every table which is not parsed yet, at the same time on `executor` if given.
+        # reads are positional, so tables which do not depend on each other are parsed in parallel
+        # on free threaded builds, and the ones which do wait for the parse of the other
+        if executor is None:
+            for name in self._tables:
+                getattr(self, name)
+            return
+        for future in [executor.submit(getattr, self, name) for name in self._tables]:
+            future.result()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_locks'] = {}
+        return state
+
+    @_table
+    def bone_table(self) -> MDLBoneTable:
+        return MDLBoneTable(self._buf, self.header.bone_index, self.header.num_bones)
+
+    @_table
+    def bones(self) -> List[MDLBone]:
+        table = self.bone_table
+        bones = [MDLBone(table, i) for i in range(len(table))]
+        self._bone_assemble(bones)
+        return bones
+
+    @property
+    def root_bone(self) -> MDLBone:
+        self.bones
+        return self._root_bone
+
+    @_table
+    def anim_descs(self) -> List[MDLAnimDesc]:
+        (num, off) = (self.header.num_local_anim, self.header.local_anim_index)
+        bones = self.bone_table
+        ani = self.ani
+        return [
+            MDLAnimDesc(self._buf, off + i * MDLAnimDesc._size, bones, ani, self._instrument) for i in range(num)
         ]
-        buf.seek(home)
-        # bodypart
-        (num, off) = _struct_unpack('=ii', buf)
-        home = buf.tell()
-        buf.seek(off)
-        self.bodyparts = list(map(MDLBodyPart, [buf]*num))
-        # anim_blocks
-        buf.seek(home + 27*4)
-        (name_index, num, off) = _struct_unpack('=iii', buf)
-        home = buf.tell()
-        self.anim_block_name = _read_strings(buf, name_index)[0]
-        buf.seek(off)
-        self.anim_blocks = list(map(MDLAnimBlock, [buf]*num))
-
-        # assemples
-        self._bone_assemble()
-
-    def _bone_assemble(self):
-        for bone in self.bones:
+
+    @_table
+    def seq_descs(self) -> List[MDLSeqDesc]:
+        (num, off) = (self.header.num_local_seq, self.header.local_seq_index)
+        return [MDLSeqDesc(self._buf, off + i * MDLSeqDesc._size) for i in range(num)]
+
+    @_table
+    def textures(self) -> List[MDLTexture]:
+        (num, off) = (self.header.num_textures, self.header.texture_index)
+        return [MDLTexture(self._buf, off + i * MDLTexture._size) for i in range(num)]
+
+    @_table
+    def skins(self) -> List[List[MDLTexture]]:
+        header = self.header
+        (num, fnum) = (header.num_skin_ref, header.num_skin_families)
+        textures = self.textures
+        table = self._buf.array(_anim_value_dtype, header.skin_index, num * fnum).reshape(fnum, num)
+        return [[textures[t] for t in family] for family in table.tolist()]
+
+    @_table
+    def bodyparts(self) -> List[MDLBodyPart]:
+        (num, off) = (self.header.num_bodyparts, self.header.bodypart_index)
+        return [MDLBodyPart(self._buf, off + i * MDLBodyPart._size) for i in range(num)]
+
+    @_table
+    def flex_descs(self) -> List[MDLFlexDesc]:
+        (num, off) = (self.header.num_flex_desc, self.header.flex_desc_index)
+        return [MDLFlexDesc(self._buf, off + i * MDLFlexDesc._size) for i in range(num)]
+
+    @_table
+    def flex_controllers(self) -> List[MDLFlexController]:
+        (num, off) = (self.header.num_flex_controllers, self.header.flex_controller_index)
+        return [MDLFlexController(self._buf, off + i * MDLFlexController._size) for i in range(num)]
+
+    @_table
+    def flex_rules(self) -> List[MDLFlexRule]:
+        (num, off) = (self.header.num_flex_rules, self.header.flex_rule_index)
+        return [MDLFlexRule(self._buf, off + i * MDLFlexRule._size) for i in range(num)]
+
+    @_table
+    def anim_block_name(self) -> str:
+        return self._buf.string(self.header.anim_block_name_index)
+
+    @_table
+    def anim_blocks(self) -> List[MDLAnimBlock]:
+        return MDLAnimBlock._layout.records(
+            MDLAnimBlock, self._buf, self.header.anim_block_index, self.header.num_anim_blocks)
+
+    @_table
+    def ani(self) -> Optional[ANI]:
+        if self._ani_src is None or not self.header.num_anim_blocks:
+            return None
+        ranges = [(block.data_start, block.data_end) for block in self.anim_blocks]
+        return ANI(self._ani_src, ranges, self.checksum, self._instrument)
+
+    def _bone_assemble(self, bones: List[MDLBone]):
+        for bone in bones:
             if bone.parent_id < 0:
-                self.root_bone = bone
+                self._root_bone = bone
                 continue
-            parent = self.bones[bone.parent_id]
+            parent = bones[bone.parent_id]
             bone.parent = parent
             parent.children.append(bone)
 
@@ -0,0 +1,112 @@
+from typing import Dict, List
+
+import numpy as np
+
+from .mdl import MDL, MDLTexture
+from .vtx import VTX, VTXStripGroup
+from .vvd import VVD, VVD_VERTEX_DTYPE
+
+# OptimizedModel::StripHeaderFlags_t
+_STRIP_IS_TRILIST = 0x01
+_STRIP_IS_TRISTRIP = 0x02
+
+
+class DrawBatch:
+    material: MDLTexture
+    # indices into VVD.vertex_array, handy to pick skinned vertexes
+    vertex_ids: np.ndarray
+    vertices: np.ndarray  # VVD_VERTEX_DTYPE
+    tangents: np.ndarray
+    indices: np.ndarray  # uint32 triangle list
+
+    def __init__(self, material: MDLTexture, vertex_ids: np.ndarray, vertices: np.ndarray,
+                 tangents: np.ndarray, indices: np.ndarray):
+        self.material = material
+        self.vertex_ids = vertex_ids
+        self.vertices = vertices
+        self.tangents = tangents
+        self.indices = indices
+
+    def __str__(self) -> str:
+        return self.material.name
+
+
+def _strip_group_triangles(group: VTXStripGroup) -> np.ndarray:
+    # triangle list of strip group vertex indices
+    indices = group.index_array
+    if len(group.strip_array) == 0:
+        return indices
+    triangles = []
+    for strip in group.strip_array:
+        start = strip['index_offset']
+        part = indices[start:start + strip['num_indices']]
+        if strip['flags'] & _STRIP_IS_TRISTRIP:
+            n = len(part) - 2
+            if n <= 0:
+                continue
+            tri = np.stack([part[:n], part[1:n + 1], part[2:n + 2]], axis=1)
+            odd = np.arange(n) % 2 == 1
+            tri[odd] = tri[odd][:, [1, 0, 2]]
+            degenerate = (tri[:, 0] == tri[:, 1]) | (tri[:, 1] == tri[:, 2]) | (tri[:, 0] == tri[:, 2])
+            part = tri[~degenerate].reshape(-1)
+        triangles.append(part)
+    return np.concatenate(triangles) if triangles else indices[:0]
+
+
+def _mesh_vertex_starts(mdl: MDL, lod: int) -> List[List[List[int]]]:
+    # first vertex of every mesh [bodypart][model][mesh] among the vertexes of a lod. the offsets
+    # stored in the mdl are for lod 0, past it meshes follow each other within a model and models
+    # follow each other, counted with num_lod_vertexes of the lod like Studio_SetRootLOD does
+    starts = []
+    total = 0
+    for bodypart in mdl.bodyparts:
+        models = []
+        for model in bodypart.models:
+            if lod == 0:
+                base = model.vertex_index // VVD_VERTEX_DTYPE.itemsize
+                models.append([base + mesh.vertex_offset for mesh in model.meshes])
+                continue
+            meshes = []
+            for mesh in model.meshes:
+                meshes.append(total)
+                total += mesh.num_lod_vertexes[lod]
+            models.append(meshes)
+        starts.append(models)
+    return starts
+
+
+def assemble(mdl: MDL, vtx: VTX, vvd: VVD, lod: int = 0, skin: int = 0, body: int = 0) -> List[DrawBatch]:
+    # one draw batch per material of the models selected by the body group value `body`
+    if vtx.lods is not None and lod not in vtx.lods:
+        raise Exception('lod %d of vtx is not loaded' % lod)
+    lod_vertex_ids = vvd.lod_vertex_indices(lod)
+    skin_table = mdl.skins[skin] if mdl.skins else mdl.textures
+    starts = _mesh_vertex_starts(mdl, lod)
+
+    # keyed by the texture a skinref resolves to, skinrefs sharing a texture share a batch
+    parts: Dict[MDLTexture, List[np.ndarray]] = {}
+    for bodypart, vtx_bodypart, bodypart_starts in zip(mdl.bodyparts, vtx.body_parts, starts):
+        if bodypart.num_models == 0:
+            continue
+        index = body // max(bodypart.base, 1) % bodypart.num_models
+        model = bodypart.models[index]
+        vtx_model = vtx_bodypart.models[index]
+        if lod >= len(vtx_model.model_lods):
+            continue
+        for mesh, vtx_mesh, start in zip(model.meshes, vtx_model.model_lods[lod].meshes, bodypart_starts[index]):
+            for group in vtx_mesh.strip_groups:
+                ids = group.vertex_array['orig_mesh_vert_id'].astype(np.int64) + start
+                parts.setdefault(skin_table[mesh.material], []).append(ids[_strip_group_triangles(group)])
+
+    batches = []
+    for material, triangles in parts.items():
+        ids, indices = np.unique(np.concatenate(triangles), return_inverse=True)
+        ids = lod_vertex_ids[ids]
+        batches.append(DrawBatch(
+            material,
+            ids,
+            vvd.vertex_array[ids],
+            vvd.tangent_array[ids],
+            indices.astype(np.uint32).reshape(-1),
+        ))
+    return batches
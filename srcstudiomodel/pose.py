@@ -0,0 +1,69 @@
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from .mathlib import concat_transforms, quaternion_matrix
+from .mdl import MDLAnimDesc, MDLBone, MDLBoneTable
+
+
+class Skeleton:
+    parents: np.ndarray
+    # bone ids grouped by the depth in the hierarchy, root first
+    levels: List[np.ndarray]
+    order: np.ndarray
+
+    bind_pos: np.ndarray
+    bind_quat: np.ndarray
+    pose_to_bone: np.ndarray
+
+    def __init__(self, bones: Union[MDLBoneTable, List[MDLBone]]):
+        num = len(bones)
+        if isinstance(bones, MDLBoneTable):
+            (parents, pos, quat, pose_to_bone) = (bones.parent_ids, bones.pos, bones.quat, bones.pose_to_bone)
+        else:
+            parents = [bone.parent_id for bone in bones]
+            pos = [bone.pos for bone in bones]
+            quat = [bone.quat for bone in bones]
+            pose_to_bone = [bone.pose_to_bone for bone in bones]
+        self.parents = np.array(parents, np.int64).reshape(num)
+        depths = [-1] * num
+        for i in range(num):
+            chain = []
+            j = i
+            while j >= 0 and depths[j] < 0:
+                chain.append(j)
+                j = int(self.parents[j])
+                if len(chain) > num:
+                    raise Exception('bone hierarchy has a cycle')
+            depth = depths[j] if j >= 0 else -1
+            for k in reversed(chain):
+                depth += 1
+                depths[k] = depth
+        depth = np.array(depths, np.int64)
+        self.levels = [np.flatnonzero(depth == d) for d in range(int(depth.max(initial=-1)) + 1)]
+        self.order = np.concatenate(self.levels) if self.levels else np.zeros(0, np.int64)
+        self.bind_pos = np.array(pos, np.float64).reshape(num, 3)
+        self.bind_quat = np.array(quat, np.float64).reshape(num, 4)
+        self.pose_to_bone = np.array(pose_to_bone, np.float64).reshape(num, 3, 4)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def world_matrices(self, pos: np.ndarray, quat: np.ndarray) -> np.ndarray:
+        # local positions (..., bones, 3) and quaternions (..., bones, 4)
+        # to bone-to-world matrices (..., bones, 3, 4)
+        matrices = quaternion_matrix(quat, pos)
+        for level in self.levels[1:]:
+            matrices[..., level, :, :] = concat_transforms(
+                matrices[..., self.parents[level], :, :],
+                matrices[..., level, :, :],
+            )
+        return matrices
+
+    def bind_matrices(self) -> np.ndarray:
+        return self.world_matrices(self.bind_pos, self.bind_quat)
+
+    def animate(self, anim_desc: MDLAnimDesc, frames: Optional[Sequence[int]] = None) -> np.ndarray:
+        # bone-to-world matrices (frames, bones, 3, 4) of an animation
+        pos, quat = anim_desc.local_pose(frames)
+        return self.world_matrices(pos, quat)
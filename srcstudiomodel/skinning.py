@@ -0,0 +1,35 @@
+from typing import Tuple, Union
+
+import numpy as np
+
+from .const import _MAX_NUM_BONES_PER_VERT
+from .mathlib import concat_transforms
+from .vvd import VVD
+
+
+def pose_to_world(bone_to_world: np.ndarray, pose_to_bone: np.ndarray) -> np.ndarray:
+    # skinning matrices (..., bones, 3, 4) which move bind pose vertices to the posed ones
+    return concat_transforms(bone_to_world, pose_to_bone)
+
+
+def skin(
+    vertices: Union[VVD, np.ndarray],
+    bone_to_world: np.ndarray,
+    pose_to_bone: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # linear blend skinning of VVD vertices with bone-to-world matrices (..., bones, 3, 4)
+    # (e.g. from Skeleton.animate) and pose_to_bone (bones, 3, 4) of every MDLBone.
+    # returns positions and normals (..., vertices, 3)
+    if isinstance(vertices, VVD):
+        vertices = vertices.vertex_array
+    matrices = pose_to_world(np.asarray(bone_to_world, np.float64), np.asarray(pose_to_bone, np.float64))
+
+    used = np.arange(_MAX_NUM_BONES_PER_VERT) < vertices['numbones'][:, np.newaxis]
+    weights = np.where(used, vertices['weight'], 0.0)
+    # (..., vertices, 3, 4) blend of up to three bones per vertex
+    blended = np.einsum('vk,...vkij->...vij', weights, matrices[..., vertices['bone'], :, :])
+
+    rotation = blended[..., :3]
+    positions = (rotation @ vertices['position'].astype(np.float64)[..., np.newaxis])[..., 0] + blended[..., 3]
+    normals = (rotation @ vertices['normal'].astype(np.float64)[..., np.newaxis])[..., 0]
+    return positions, normals
@@ -1,4 +1,7 @@
-from typing import Tuple
+from io import BufferedIOBase
+from mmap import mmap
+from os import PathLike
+from typing import Tuple, Union
 
 
 Vector2 = Tuple[float, float]
@@ -10,3 +13,6 @@ Matrix3x4 = Tuple[
     Tuple[float, float, float, float],
     Tuple[float, float, float, float],
 ]
+
+# a path, the raw file bytes, a memory map or an opened binary file
+Source = Union[str, PathLike, bytes, bytearray, memoryview, mmap, BufferedIOBase]
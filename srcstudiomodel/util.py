@@ -1,9 +1,164 @@
-from io import BufferedReader
+import mmap
+import os
 import struct
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, TypeVar, Union
 
+import numpy as np
 
-def _struct_unpack(format: str, buf: BufferedReader) -> tuple:
-    return struct.unpack(
-        format,
-        buf.read(struct.calcsize(format))
-    )
+from .type import Source
+
+
+class Reader:
+    # every read is positional, nothing moves a shared cursor, so one Reader (and the objects
+    # parsed from it) can be used by any number of threads at the same time
+    data: Union[bytes, bytearray, mmap.mmap]
+    # the file, when opened from a path
+    path: Optional[str]
+    _strings: Dict[int, str]
+
+    def __init__(self, src: Source):
+        self._strings = {}
+        self.path = None
+        if isinstance(src, Reader):
+            (self.data, self.path) = (src.data, src.path)
+        elif isinstance(src, (bytes, bytearray, mmap.mmap)):
+            self.data = src
+        elif isinstance(src, memoryview):
+            self.data = src.tobytes()
+        elif isinstance(src, (str, os.PathLike)):
+            self.path = os.fspath(src)
+            with open(src, 'rb') as f:
+                try:
+                    self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # empty file can not be mapped
+                    self.data = f.read()
+        else:
+            self.data = src.read()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __reduce__(self):
+        # a mapping can not be pickled, so a file is opened again and anything else is copied
+        if self.path is not None:
+            return (Reader, (self.path,))
+        return (Reader, (self.data if isinstance(self.data, bytes) else self.data[:],))
+
+    def unpack(self, format: str, offset: int) -> tuple:
+        return struct.unpack_from(format, self.data, offset)
+
+    def unpack_struct(self, s: struct.Struct, offset: int) -> tuple:
+        return s.unpack_from(self.data, offset)
+
+    def view(self, offset: int, size: int) -> memoryview:
+        return memoryview(self.data)[offset:offset + size]
+
+    def read(self, offset: int, size: int) -> bytes:
+        return self.data[offset:offset + size]
+
+    def array(self, dtype: np.dtype, offset: int, num: int) -> np.ndarray:
+        if num == 0:
+            return np.empty(0, dtype)
+        return np.frombuffer(self.data, dtype, num, offset)
+
+    def string(self, offset: int) -> str:
+        # names are shared between many records, so decode each offset once
+        # and intern it so that equal names of different offsets share one str
+        s = self._strings.get(offset)
+        if s is None:
+            end = self.data.find(b'\0', offset)
+            if end < 0:
+                end = len(self.data)
+            s = self._strings[offset] = sys.intern(self.data[offset:end].decode())
+        return s
+
+
+T = TypeVar('T')
+
+
+class Layout:
+    # a record format compiled once into a struct.Struct. fields are (name, format) pairs in
+    # file order; a repeated format like '3f' gives one tuple field, '64s' stays bytes and names
+    # starting with '_' (offsets resolved by the caller, padding) are not assigned as attributes.
+    # grouping and assignment are generated as straight line code, like namedtuple does
+    names: List[str]
+    size: int
+    # sets the public fields of unpacked values as attributes of an object
+    assign: Callable[[Any, tuple], None]
+
+    def __init__(self, *fields: Tuple[str, str]):
+        self.names = []
+        items = []
+        index = 0
+        for name, format in fields:
+            count = int(format[:-1] or 1)
+            if format[-1] == 'x':
+                continue
+            if format[-1] == 's':
+                count = 1
+            self.names.append(name)
+            items.append('v[%d:%d]' % (index, index + count) if count > 1 else 'v[%d]' % index)
+            index += count
+        self._struct = struct.Struct('=' + ''.join(format for _, format in fields))
+        self.size = self._struct.size
+
+        namespace: Dict[str, Any] = {}
+        grouped = index != len(self.names)
+        if grouped:
+            exec('def group(v): return (%s,)' % ', '.join(items), namespace)
+            self._group = namespace['group']
+        else:
+            self._group = None
+        public = [(name, i) for i, name in enumerate(self.names) if not name.startswith('_')]
+        exec('def assign(obj, v):\n    d = obj.__dict__\n%s' % ''.join(
+            '    d[%r] = v[%d]\n' % (name, i) for name, i in public) if public else 'def assign(obj, v): pass',
+            namespace)
+        self.assign = namespace['assign']
+
+    def unpack(self, buf: Reader, offset: int) -> tuple:
+        values = buf.unpack_struct(self._struct, offset)
+        return self._group(values) if self._group else values
+
+    def iter_unpack(self, buf: Reader, offset: int, num: int) -> Iterator[tuple]:
+        # consecutive records, without copying the buffer
+        if num <= 0:
+            return iter(())
+        view = buf.view(offset, num * self.size)
+        if len(view) < num * self.size:
+            raise struct.error('iter_unpack requires a buffer of %d bytes' % (num * self.size))
+        values = self._struct.iter_unpack(view)
+        return map(self._group, values) if self._group else values
+
+    def records(self, cls: Type[T], buf: Reader, offset: int, num: int) -> List[T]:
+        # consecutive records as `cls` objects, for classes which only hold their fields
+        assign = self.assign
+        new = cls.__new__
+        result = []
+        for values in self.iter_unpack(buf, offset, num):
+            obj = new(cls)
+            assign(obj, values)
+            result.append(obj)
+        return result
+
+
+def _read_head(src: Source, size: int) -> bytes:
+    # the first `size` bytes with a single small read, without mapping the whole file
+    if isinstance(src, Reader):
+        head = src.read(0, size)
+    elif isinstance(src, (bytes, bytearray, memoryview, mmap.mmap)):
+        head = bytes(src[:size])
+    elif isinstance(src, (str, os.PathLike)):
+        with open(src, 'rb') as f:
+            head = f.read(size)
+    else:
+        # a positional read when the file has a descriptor, so its position is left alone
+        start = src.tell()
+        try:
+            head = os.pread(src.fileno(), size, start)
+        except (AttributeError, OSError):
+            head = src.read(size)
+            src.seek(start)
+    if len(head) < size:
+        raise Exception('header is truncated')
+    return head
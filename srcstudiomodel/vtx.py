@@ -1,8 +1,33 @@
-from io import BufferedReader
-from typing import List
+from functools import cached_property
+from typing import Collection, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
 
 from .const import _MAX_NUM_BONES_PER_VERT
-from .util import _struct_unpack
+from .type import Source
+from .util import Layout, Reader, _read_head
+from .instrument import Instrument, measure
+
+
+# OptimizedModel::Vertex_t
+VTX_VERTEX_DTYPE = np.dtype([
+    ('bone_weight_index', 'u1', (_MAX_NUM_BONES_PER_VERT,)),
+    ('num_bones', 'u1'),
+    ('orig_mesh_vert_id', '<u2'),
+    ('bone_id', 'i1', (_MAX_NUM_BONES_PER_VERT,)),
+])
+# OptimizedModel::StripHeader_t
+VTX_STRIP_DTYPE = np.dtype([
+    ('num_indices', '<i4'),
+    ('index_offset', '<i4'),
+    ('num_verts', '<i4'),
+    ('vert_offset', '<i4'),
+    ('num_bones', '<i2'),
+    ('flags', 'u1'),
+    ('num_bone_state_changes', '<i4'),
+    ('bone_state_change_offset', '<i4'),
+])
+VTX_INDEX_DTYPE = np.dtype('<u2')
 
 
 class VTXVertex:
@@ -11,16 +36,11 @@ class VTXVertex:
     orig_mesh_vert_id: int
     bone_id: List[int]
 
-    def __init__(self, buf: BufferedReader):
-        self.bone_weight_index = list(map(
-            lambda _: _struct_unpack('=B', buf)[0],
-            range(_MAX_NUM_BONES_PER_VERT),
-        ))
-        (self.num_bones, self.orig_mesh_vert_id) = _struct_unpack('=BH', buf)
-        self.bone_id = list(map(
-            lambda _: _struct_unpack('=b', buf)[0],
-            range(_MAX_NUM_BONES_PER_VERT),
-        ))
+    def __init__(self, bone_weight_index: List[int], num_bones: int, orig_mesh_vert_id: int, bone_id: List[int]):
+        self.bone_weight_index = bone_weight_index
+        self.num_bones = num_bones
+        self.orig_mesh_vert_id = orig_mesh_vert_id
+        self.bone_id = bone_id
 
 
 class VTXStrip:
@@ -33,34 +53,54 @@ class VTXStrip:
     num_bone_state_changes: int  # maybe useless
     bone_state_change_offset: int  # maybe useless
 
-    def __init__(self, buf: BufferedReader):
-        (self.num_indices, self.index_offset, self.num_verts,
-         self.vert_offset, self.num_bones, self.flags,
-         self.num_bone_state_changes, self.bone_state_change_offset) \
-            = _struct_unpack('=iiiihBii', buf)
+    def __init__(self, num_indices: int, index_offset: int, num_verts: int, vert_offset: int,
+                 num_bones: int, flags: int, num_bone_state_changes: int, bone_state_change_offset: int):
+        self.num_indices = num_indices
+        self.index_offset = index_offset
+        self.num_verts = num_verts
+        self.vert_offset = vert_offset
+        self.num_bones = num_bones
+        self.flags = flags
+        self.num_bone_state_changes = num_bone_state_changes
+        self.bone_state_change_offset = bone_state_change_offset
 
 
 class VTXStripGroup:
     flags: int
 
-    vertexes: List[VTXVertex]
-    indices: List[int]
-    strips: List[VTXStrip]
-
-    def __init__(self, buf: BufferedReader):
-        (vnum, voff, inum, ioff, snum, soff, self.flags) \
-            = _struct_unpack('=iiiiiiB', buf)
-        end = buf.tell()
-        buf.seek(voff - 25, 1)
-        self.vertexes = list(map(VTXVertex, [buf] * vnum))
-        buf.seek(end + ioff - 25)
-        self.indices = list(map(
-            lambda _: _struct_unpack('=H', buf)[0],
-            range(inum)
+    vertex_array: np.ndarray  # VTX_VERTEX_DTYPE
+    index_array: np.ndarray  # VTX_INDEX_DTYPE
+    strip_array: np.ndarray  # VTX_STRIP_DTYPE
+
+    # OptimizedModel::StripGroupHeader_t
+    _layout = Layout(
+        ('num_verts', 'i'), ('vert_offset', 'i'), ('num_indices', 'i'), ('index_offset', 'i'),
+        ('num_strips', 'i'), ('strip_offset', 'i'), ('flags', 'B'),
+    )
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        (vnum, voff, inum, ioff, snum, soff, self.flags) = self._layout.unpack(buf, offset)
+        self.vertex_array = buf.array(VTX_VERTEX_DTYPE, offset + voff, vnum)
+        self.index_array = buf.array(VTX_INDEX_DTYPE, offset + ioff, inum)
+        self.strip_array = buf.array(VTX_STRIP_DTYPE, offset + soff, snum)
+
+    @cached_property
+    def vertexes(self) -> List[VTXVertex]:
+        array = self.vertex_array
+        return list(map(
+            VTXVertex,
+            array['bone_weight_index'].tolist(), array['num_bones'].tolist(),
+            array['orig_mesh_vert_id'].tolist(), array['bone_id'].tolist(),
         ))
-        buf.seek(end + soff - 25)
-        self.strips = list(map(VTXStrip, [buf] * snum))
-        buf.seek(end)
+
+    @cached_property
+    def indices(self) -> List[int]:
+        return self.index_array.tolist()
+
+    @cached_property
+    def strips(self) -> List[VTXStrip]:
+        return [VTXStrip(*strip) for strip in self.strip_array.tolist()]
 
 
 class VTXMesh:
@@ -68,12 +108,15 @@ class VTXMesh:
 
     strip_groups: List[VTXStripGroup]
 
-    def __init__(self, buf: BufferedReader):
-        (num, offset, self.flags) = _struct_unpack('=iiB', buf)
-        end = buf.tell()
-        buf.seek(offset - 9, 1)
-        self.strip_groups = list(map(VTXStripGroup, [buf] * num))
-        buf.seek(end)
+    # OptimizedModel::MeshHeader_t
+    _layout = Layout(('num_strip_groups', 'i'), ('strip_group_header_offset', 'i'), ('flags', 'B'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        (num, group_offset, self.flags) = self._layout.unpack(buf, offset)
+        self.strip_groups = [
+            VTXStripGroup(buf, offset + group_offset + i * VTXStripGroup._size) for i in range(num)
+        ]
 
 
 class VTXModelLOD:
@@ -81,34 +124,41 @@ class VTXModelLOD:
 
     meshes: List[VTXMesh]
 
-    def __init__(self, buf: BufferedReader):
-        (num, offset, self.switch_point) = _struct_unpack('=iif', buf)
-        end = buf.tell()
-        buf.seek(offset - 12, 1)
-        self.meshes = list(map(VTXMesh, [buf] * num))
-        buf.seek(end)
+    # OptimizedModel::ModelLODHeader_t
+    _layout = Layout(('num_meshes', 'i'), ('mesh_offset', 'i'), ('switch_point', 'f'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        (num, mesh_offset, self.switch_point) = self._layout.unpack(buf, offset)
+        self.meshes = [VTXMesh(buf, offset + mesh_offset + i * VTXMesh._size) for i in range(num)]
 
 
 class VTXModel:
-    model_lods: List[VTXModelLOD]
+    # None for the lods which were not selected
+    model_lods: List[Optional[VTXModelLOD]]
+
+    # OptimizedModel::ModelHeader_t
+    _layout = Layout(('num_lods', 'i'), ('lod_offset', 'i'))
+    _size = _layout.size
 
-    def __init__(self, buf: BufferedReader):
-        (num, offset) = _struct_unpack('=ii', buf)
-        end = buf.tell()
-        buf.seek(offset - 8, 1)
-        self.model_lods = list(map(VTXModelLOD, [buf] * num))
-        buf.seek(end)
+    def __init__(self, buf: Reader, offset: int, lods: Optional[Collection[int]] = None):
+        (num, lod_offset) = self._layout.unpack(buf, offset)
+        self.model_lods = [
+            VTXModelLOD(buf, offset + lod_offset + i * VTXModelLOD._size) if lods is None or i in lods else None
+            for i in range(num)
+        ]
 
 
 class VTXBodyPart:
     models: List[VTXModel]
 
-    def __init__(self, buf: BufferedReader):
-        (num, offset) = _struct_unpack('=ii', buf)
-        end = buf.tell()
-        buf.seek(offset - 8, 1)
-        self.models = list(map(VTXModel, [buf] * num))
-        buf.seek(end)
+    # OptimizedModel::BodyPartHeader_t
+    _layout = Layout(('num_models', 'i'), ('model_offset', 'i'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int, lods: Optional[Collection[int]] = None):
+        (num, model_offset) = self._layout.unpack(buf, offset)
+        self.models = [VTXModel(buf, offset + model_offset + i * VTXModel._size, lods) for i in range(num)]
 
 
 class VTX:
@@ -122,12 +172,48 @@ class VTX:
     material_replacement_list_offset: int
 
     body_parts: List[VTXBodyPart]
+    # the lods parsed, None for all of them
+    lods: Optional[Tuple[int, ...]]
+
+    def __init__(self, src: Source, instrument: Optional[Instrument] = None, lods: Optional[Iterable[int]] = None):
+        # with `lods`, the strip groups of the other lods are not read at all
+        buf = Reader(src) if instrument is None else instrument.reader(src)
+        with measure(instrument, 'vtx', 'header', buf):
+            (self.version, self.vert_cache_size,
+             self.max_bones_per_strip, self.max_bones_per_tri,
+             self.max_bones_per_vert, self.checksum, self.num_lods,
+             self.material_replacement_list_offset,
+             num_body_parts, body_part_offset) = _vtx_header.unpack(buf, 0)
+        self.lods = None if lods is None else tuple(sorted(set(lods)))
+        for lod in self.lods or ():
+            if not 0 <= lod < self.num_lods:
+                raise Exception('lod %d of vtx is out of range, it has %d lods' % (lod, self.num_lods))
+        with measure(instrument, 'vtx', 'body_parts', buf):
+            self.body_parts = [
+                VTXBodyPart(buf, body_part_offset + i * VTXBodyPart._size, self.lods) for i in range(num_body_parts)
+            ]
+
+
+class VTXHeader(NamedTuple):
+    version: int
+    vert_cache_size: int
+    max_bones_per_strip: int
+    max_bones_per_tri: int
+    max_bones_per_vert: int
+    checksum: int
+    num_lods: int
+    material_replacement_list_offset: int
+    num_body_parts: int
+    body_part_offset: int
+
+
+# OptimizedModel::FileHeader_t
+_vtx_header = Layout(
+    ('version', 'I'), ('vert_cache_size', 'i'), ('max_bones_per_strip', 'H'), ('max_bones_per_tri', 'H'),
+    ('max_bones_per_vert', 'i'), ('checksum', 'I'), ('num_lods', 'i'), ('material_replacement_list_offset', 'i'),
+    ('num_body_parts', 'i'), ('body_part_offset', 'i'),
+)
+
 
-    def __init__(self, buf: BufferedReader):
-        (self.version, self.vert_cache_size,
-         self.max_bones_per_strip, self.max_bones_per_tri,
-         self.max_bones_per_vert, self.checksum, self.num_lods,
-         self.material_replacement_list_offset,
-         num_body_parts, body_part_offset) = _struct_unpack('=IiHHiiiiii', buf)
-        buf.seek(body_part_offset)
-        self.body_parts = list(map(VTXBodyPart, [buf] * num_body_parts))
+def probe_vtx(src: Source) -> VTXHeader:
+    return VTXHeader(*_vtx_header.unpack(Reader(_read_head(src, _vtx_header.size)), 0))
@@ -1,9 +1,30 @@
-from io import BufferedReader
-from typing import List, Tuple
+from functools import cached_property
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
 
 from .const import _MAX_NUM_LODS, _MAX_NUM_BONES_PER_VERT
-from .util import _struct_unpack
-from .type import Vector3, Vector2
+from .util import Layout, Reader, _read_head
+from .instrument import Instrument, measure
+from .type import Source, Vector3, Vector2
+
+
+# mstudiovertex_t
+VVD_VERTEX_DTYPE = np.dtype([
+    ('weight', '<f4', (_MAX_NUM_BONES_PER_VERT,)),
+    ('bone', 'u1', (_MAX_NUM_BONES_PER_VERT,)),
+    ('numbones', 'u1'),
+    ('position', '<f4', (3,)),
+    ('normal', '<f4', (3,)),
+    ('tex_coord', '<f4', (2,)),
+])
+VVD_TANGENT_DTYPE = np.dtype(('<f4', (4,)))
+# vertexFileFixup_t
+VVD_FIXUP_DTYPE = np.dtype([
+    ('lod', '<i4'),
+    ('source_vertex_id', '<i4'),
+    ('num_vertexes', '<i4'),
+])
 
 
 class VVDFixup:
@@ -11,9 +32,12 @@ class VVDFixup:
     source_vertex_id: int
     num_vertexes: int
 
-    def __init__(self, buf: BufferedReader):
-        (self.lod, self.source_vertex_id, self.num_vertexes) = \
-            _struct_unpack('=iii', buf)
+    # vertexFileFixup_t
+    _layout = Layout(('lod', 'i'), ('source_vertex_id', 'i'), ('num_vertexes', 'i'))
+    _size = _layout.size
+
+    def __init__(self, buf: Reader, offset: int):
+        self._layout.assign(self, self._layout.unpack(buf, offset))
 
 
 class VVDBoneWeight:
@@ -21,13 +45,10 @@ class VVDBoneWeight:
     bone: List[int]
     numbones: int
 
-    _format = '=' + 'f'*_MAX_NUM_BONES_PER_VERT + 'B'*_MAX_NUM_BONES_PER_VERT + 'B'
-
-    def __init__(self, buf: BufferedReader):
-        values = _struct_unpack(VVDBoneWeight._format, buf)
-        self.weight = list(values[:_MAX_NUM_BONES_PER_VERT])
-        self.bone = list(values[_MAX_NUM_BONES_PER_VERT:_MAX_NUM_BONES_PER_VERT*2])
-        self.numbones = values[-1]
+    def __init__(self, weight: List[float], bone: List[int], numbones: int):
+        self.weight = weight
+        self.bone = bone
+        self.numbones = numbones
 
 
 class VVDVertex:
@@ -36,11 +57,11 @@ class VVDVertex:
     normal: Vector3
     tex_coord: Vector2
 
-    def __init__(self, buf: BufferedReader):
-        self.bone_weights = VVDBoneWeight(buf)
-        self.position = _struct_unpack('=fff', buf)
-        self.normal = _struct_unpack('=fff', buf)
-        self.tex_coord = _struct_unpack('=ff', buf)
+    def __init__(self, bone_weights: VVDBoneWeight, position: Vector3, normal: Vector3, tex_coord: Vector2):
+        self.bone_weights = bone_weights
+        self.position = position
+        self.normal = normal
+        self.tex_coord = tex_coord
 
 
 class VVD:
@@ -49,25 +70,134 @@ class VVD:
     num_lods: int
     num_lod_vertexes: List[int]
     fixups: List[VVDFixup]
-    vertexes: List[VVDVertex]
-    tangents: List[Tuple[float, float, float, float]]
+    fixup_array: np.ndarray  # VVD_FIXUP_DTYPE
+    # vertexes of every lod, as stored in the file
+    vertex_array: np.ndarray  # VVD_VERTEX_DTYPE
+    tangent_array: np.ndarray  # (n, 4) float32
+    # the lods selected when loading, None for all of them
+    lods: Optional[Tuple[int, ...]]
+
+    # vertex ids, vertexes and tangents of the selected lods, each gathered on first use
+    _gathered: Dict[int, List[Optional[np.ndarray]]]
+
+    def __init__(self, src: Source, instrument: Optional[Instrument] = None, lods: Optional[Iterable[int]] = None):
+        # with `lods`, the vertexes of those lods are gathered out of the file once, when first
+        # used, and the others can not be asked for. for a mapped file only their pages are read
+        buf = Reader(src) if instrument is None else instrument.reader(src)
+        with measure(instrument, 'vvd', 'header', buf):
+            header = _unpack_header(buf)
+        (self.version, self.checksum, self.num_lods) = (header.version, header.checksum, header.num_lods)
+        self.num_lod_vertexes = list(header.num_lod_vertexes)
+        with measure(instrument, 'vvd', 'fixups', buf):
+            self.fixup_array = buf.array(VVD_FIXUP_DTYPE, header.fixup_table_start, header.num_fixups)
+            self.fixups = VVDFixup._layout.records(VVDFixup, buf, header.fixup_table_start, header.num_fixups)
+
+        num = self.num_lod_vertexes[0]
+        with measure(instrument, 'vvd', 'vertexes', buf):
+            self.vertex_array = buf.array(VVD_VERTEX_DTYPE, header.vertex_data_start, num)
+            self.tangent_array = buf.array(VVD_TANGENT_DTYPE, header.tangent_data_start, num)
+
+        self.lods = None if lods is None else tuple(sorted(set(lods)))
+        for lod in self.lods or ():
+            self._check_lod(lod)
+        self._gathered = {}
+        for lod in self.lods or ():
+            if len(self.fixup_array) == 0:
+                self._gathered[lod] = [None, self.vertex_array, self.tangent_array]
+            else:
+                self._gathered[lod] = [None, None, None]
+
+    def _check_lod(self, lod: int):
+        if not 0 <= lod < self.num_lods:
+            raise Exception('lod %d of vvd is out of range, it has %d lods' % (lod, self.num_lods))
+
+    def _lod_vertex_indices(self, lod: int) -> np.ndarray:
+        self._check_lod(lod)
+        fixups = self.fixup_array
+        if len(fixups) == 0:
+            return np.arange(self.num_lod_vertexes[0])
+        fixups = fixups[fixups['lod'] >= lod]
+        counts = fixups['num_vertexes'].astype(np.int64)
+        starts = fixups['source_vertex_id'].astype(np.int64)
+        return np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+
+    def _gathered_lod(self, lod: int) -> Optional[List[Optional[np.ndarray]]]:
+        if self.lods is None:
+            return None
+        gathered = self._gathered.get(lod)
+        if gathered is None:
+            raise Exception('lod %d of vvd is not loaded' % lod)
+        if gathered[0] is None:
+            gathered[0] = self._lod_vertex_indices(lod)
+        return gathered
+
+    def lod_vertex_indices(self, lod: int = 0) -> np.ndarray:
+        # indices into vertex_array of the vertexes which the models of a lod refer
+        gathered = self._gathered_lod(lod)
+        return gathered[0] if gathered is not None else self._lod_vertex_indices(lod)
+
+    def lod_vertices(self, lod: int = 0) -> np.ndarray:
+        gathered = self._gathered_lod(lod)
+        if gathered is not None:
+            if gathered[1] is None:
+                gathered[1] = self.vertex_array.take(gathered[0])
+            return gathered[1]
+        if len(self.fixup_array) == 0:
+            return self.vertex_array
+        return self.vertex_array[self._lod_vertex_indices(lod)]
+
+    def lod_tangents(self, lod: int = 0) -> np.ndarray:
+        gathered = self._gathered_lod(lod)
+        if gathered is not None:
+            if gathered[2] is None:
+                gathered[2] = self.tangent_array.take(gathered[0], 0)
+            return gathered[2]
+        if len(self.fixup_array) == 0:
+            return self.tangent_array
+        return self.tangent_array[self._lod_vertex_indices(lod)]
+
+    @cached_property
+    def vertexes(self) -> List[VVDVertex]:
+        array = self.vertex_array
+        return [
+            VVDVertex(VVDBoneWeight(weight, bone, numbones), tuple(position), tuple(normal), tuple(tex_coord))
+            for weight, bone, numbones, position, normal, tex_coord in zip(
+                array['weight'].tolist(), array['bone'].tolist(), array['numbones'].tolist(),
+                array['position'].tolist(), array['normal'].tolist(), array['tex_coord'].tolist(),
+            )
+        ]
+
+    @cached_property
+    def tangents(self) -> List[Tuple[float, float, float, float]]:
+        return list(map(tuple, self.tangent_array.tolist()))
+
+
+class VVDHeader(NamedTuple):
+    id: int
+    version: int
+    checksum: int
+    num_lods: int
+    num_lod_vertexes: Tuple[int, ...]
+    num_fixups: int
+    fixup_table_start: int
+    vertex_data_start: int
+    tangent_data_start: int
+
 
-    def __init__(self, buf: BufferedReader):
-        start = buf.seek(0, 1)
+# vertexFileHeader_t
+_vvd_header = Layout(
+    ('id', 'I'), ('version', 'I'), ('checksum', 'I'), ('num_lods', 'i'),
+    ('num_lod_vertexes', '%di' % _MAX_NUM_LODS), ('num_fixups', 'i'), ('fixup_table_start', 'i'),
+    ('vertex_data_start', 'i'), ('tangent_data_start', 'i'),
+)
 
-        (id, self.version, self.checksum, self.num_lods) = \
-            _struct_unpack('=IIIi', buf)
-        if id != 0x56534449:
-            raise Exception('this is not vvd file.')
-        self.num_lod_vertexes = list(map(lambda _: _struct_unpack('=i', buf)[0], range(_MAX_NUM_LODS)))
-        (num_fixups, fixup_stable_start, vertex_data_start, tangent_data_start) = \
-            _struct_unpack('=iiii', buf)
 
-        buf.seek(start + fixup_stable_start)
-        self.fixups = list(map(VVDFixup, [buf] * num_fixups))
+def _unpack_header(buf: Reader) -> VVDHeader:
+    header = VVDHeader(*_vvd_header.unpack(buf, 0))
+    if header.id != 0x56534449:
+        raise Exception('this is not vvd file.')
+    return header
 
-        buf.seek(start + vertex_data_start)
-        self.vertexes = list(map(VVDVertex, [buf] * self.num_lod_vertexes[0]))
 
-        buf.seek(start + tangent_data_start)
-        self.tangents = list(map(lambda _: _struct_unpack('=ffff', buf), range(self.num_lod_vertexes[0])))
+def probe_vvd(src: Source) -> VVDHeader:
+    return _unpack_header(Reader(_read_head(src, _vvd_header.size)))
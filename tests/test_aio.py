@@ -0,0 +1,107 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate
+from srcstudiomodel import AsyncLoader, ModelBundle, aio
+
+
+@pytest.fixture
+def path(tmp_path):
+    return generate().write(tmp_path)
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    # paths decoded so far, every decode waits for `release`
+    decode = aio._decode_bundle
+    state = SimpleNamespace(paths=[], release=threading.Event())
+
+    def counting(path, sources, lazy):
+        state.paths.append(path)
+        state.release.wait(5)
+        return decode(path, sources, lazy)
+
+    monkeypatch.setattr(aio, '_decode_bundle', counting)
+    return state
+
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
+
+
+def test_overlapping_loads_share_one_decode(path, decodes):
+    async def main():
+        loader = AsyncLoader()
+        loads = [asyncio.ensure_future(loader.load(path)) for _ in range(5)]
+        await _until(lambda: decodes.paths)
+        decodes.release.set()
+        bundles = await asyncio.gather(*loads)
+        assert all(bundle is bundles[0] for bundle in bundles)
+        assert len(decodes.paths) == 1 and not loader._pending
+        # a load after the others finished decodes again
+        assert await loader.load(path) is not bundles[0]
+        assert len(decodes.paths) == 2
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_cancel_the_load(path, decodes):
+    async def main():
+        loader = AsyncLoader()
+        (first, second) = [asyncio.ensure_future(loader.load(path)) for _ in range(2)]
+        await _until(lambda: decodes.paths)
+        first.cancel()
+        await asyncio.sleep(0)
+        assert first.cancelled() and not second.done()
+        decodes.release.set()
+        bundle = await second
+        assert isinstance(bundle, ModelBundle) and len(decodes.paths) == 1
+
+    asyncio.run(main())
+
+
+def test_load_outlives_its_waiters(path, decodes):
+    async def main():
+        loader = AsyncLoader()
+        load = asyncio.ensure_future(loader.load(path))
+        await _until(lambda: decodes.paths)
+        task = loader._pending[('bundle', path)]
+        load.cancel()
+        await asyncio.sleep(0)
+        # a later load joins the one still running
+        again = asyncio.ensure_future(loader.load(path))
+        decodes.release.set()
+        assert await again is task.result()
+        assert len(decodes.paths) == 1 and not loader._pending
+
+    asyncio.run(main())
+
+
+def test_failed_load_is_forgotten(tmp_path, path):
+    async def main():
+        loader = AsyncLoader()
+        missing = str(tmp_path / 'missing.mdl')
+        results = await asyncio.gather(*[loader.load(missing) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, FileNotFoundError) for result in results)
+        assert not loader._pending
+        (bundle, mdl) = await asyncio.gather(loader.load(path), loader.load_mdl(path))
+        assert bundle.mdl is not mdl and mdl.checksum == bundle.checksum
+
+    asyncio.run(main())
+
+
+def test_process_pool(path):
+    async def main():
+        # the read threads of the loop are running, so the workers are not forked
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn')) as executor:
+            return await aio.load_bundle(path, executor)
+
+    bundle = asyncio.run(main())
+    np.testing.assert_array_equal(bundle.vvd.vertex_array, ModelBundle(path).vvd.vertex_array)
@@ -0,0 +1,107 @@
+import pickle
+import struct
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate
+from srcstudiomodel import ANI, MDL, ModelBundle
+
+_ARGS = dict(num_anims=3, num_frames=25, section_frames=4)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return generate(anim_block_size=200, **_ARGS).write(tmp_path)
+
+
+def _assert_poses_equal(mdl, expected):
+    for anim_desc, other in zip(mdl.anim_descs, expected.anim_descs):
+        for (a, b) in zip(anim_desc.local_pose(), other.local_pose()):
+            np.testing.assert_array_equal(a, b)
+
+
+def test_sections_from_blocks(path):
+    # the same animation data, once in the mdl and once in blocks of the ani
+    mdl = MDL(path, ani=path[:-4] + '.ani')
+    assert len(mdl.ani) > 2
+    blocks = {section.anim_block for anim_desc in mdl.anim_descs for section in anim_desc.sections}
+    assert blocks == set(range(len(mdl.ani)))
+    _assert_poses_equal(mdl, MDL(generate(**_ARGS).mdl))
+
+
+def test_bundle_finds_ani(path):
+    bundle = ModelBundle(path)
+    assert bundle.ani_path == path[:-4] + '.ani'
+    _assert_poses_equal(bundle.mdl, MDL(generate(**_ARGS).mdl))
+
+
+def test_without_ani(path):
+    # sections in blocks have no data when the ani is not given
+    anim_desc = MDL(path).anim_descs[0]
+    assert anim_desc.anims[0] is not None
+    assert all(anim is None for (anim, section) in zip(anim_desc.anims, anim_desc.sections) if section.anim_block)
+
+
+def test_checksum_mismatch(path):
+    ani = path[:-4] + '.ani'
+    with open(ani, 'r+b') as f:
+        f.seek(8)
+        f.write(struct.pack('=I', 1))
+    with pytest.raises(Exception, match='checksum of ani does not match mdl'):
+        MDL(path, ani=ani).anim_descs[0].local_pose()
+
+
+def test_block_out_of_range(path):
+    ani = MDL(path, ani=path[:-4] + '.ani').ani
+    # block 0 stands for the mdl itself
+    for index in (0, -1, len(ani)):
+        with pytest.raises(Exception, match='animation block out of range'):
+            ani.block(index)
+
+
+def test_broken_block(path):
+    mdl = MDL(path)
+    ranges = [(block.data_start, block.data_end) for block in mdl.anim_blocks]
+    ranges[1] = (ranges[1][0], 1 << 30)
+    with pytest.raises(Exception, match='broken animation block'):
+        ANI(path[:-4] + '.ani', ranges).block(1)
+
+
+def test_block_cache(path):
+    ani = MDL(path, ani=path[:-4] + '.ani').ani
+    ani.block_cache_size = 2
+    first = ani.block(1)
+    assert ani.block(1) is first
+    ani.block(2)
+    ani.block(1)  # most recently used again
+    ani.block(3)
+    assert list(ani._blocks) == [1, 3]
+    assert ani.block(1) is first
+    assert ani.block(2) is not None and list(ani._blocks) == [1, 2]
+
+
+def test_section_cache():
+    anim_desc = MDL(generate(**_ARGS).mdl).anim_descs[0]
+    anim_desc.section_cache_size = 3
+    anims = [anim_desc.section_anim(s) for s in range(5)]
+    assert list(anim_desc._decoded) == [2, 3, 4]
+    assert anim_desc.section_anim(4) is anims[4]
+    assert anim_desc.section_anim(0) is not anims[0]
+    assert list(anim_desc._decoded) == [3, 4, 0]
+
+
+@pytest.mark.parametrize('from_path', [True, False])
+def test_pickle(path, from_path):
+    if from_path:
+        bundle = ModelBundle(path)
+    else:
+        sources = []
+        for file in (path, path[:-4] + '.vvd', path[:-4] + '.dx90.vtx'):
+            with open(file, 'rb') as f:
+                sources.append(f.read())
+        bundle = ModelBundle(path, sources=tuple(sources))
+    copy = pickle.loads(pickle.dumps(bundle))
+    _assert_poses_equal(copy.mdl, bundle.mdl)
+    np.testing.assert_array_equal(copy.vvd.vertex_array, bundle.vvd.vertex_array)
+    assert copy.mdl.ani.path == path[:-4] + '.ani'
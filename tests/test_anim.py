@@ -0,0 +1,94 @@
+import random
+import struct
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import _section_spans, generate
+from srcstudiomodel import MDL
+from srcstudiomodel.mdl import _expand_anim_value
+from srcstudiomodel.util import Reader
+
+
+def _reference(data: bytes, offset: int, frames: int) -> list:
+    # ExtractAnimValue of the engine, walking the runs again for every frame
+    values = []
+    for frame in range(frames):
+        (k, slot) = (frame, offset)
+        while True:
+            (valid, total) = struct.unpack_from('=BB', data, slot)
+            if total > k:
+                break
+            k -= total
+            slot += (valid + 1) * 2
+        index = k + 1 if valid > k else valid
+        values.append(struct.unpack_from('<h', data, slot + index * 2)[0])
+    return values
+
+
+def _stream(rng: random.Random, frames: int) -> bytes:
+    out = bytearray()
+    covered = 0
+    while covered < frames:
+        total = rng.randint(1, 255)
+        valid = rng.randint(1, min(total, 8))
+        out += struct.pack('=BB', valid, total)
+        out += struct.pack('<%dh' % valid, *[rng.randint(-32768, 32767) for _ in range(valid)])
+        covered += total
+    return bytes(out)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_expand_anim_value(seed):
+    rng = random.Random(seed)
+    frames = rng.randint(1, 600)
+    pad = rng.randint(0, 5)  # odd offsets too
+    data = bytes(pad) + _stream(rng, frames) + bytes(4)
+    expected = _reference(data, pad, frames)
+    np.testing.assert_array_equal(_expand_anim_value(Reader(data), pad, frames), expected)
+
+
+def test_expand_anim_value_runs():
+    # a run holds its last valid value, the next run starts after its values
+    data = struct.pack('=BB3h', 3, 5, 10, 20, 30) + struct.pack('=BBh', 1, 2, -7) + struct.pack('=BB2h', 2, 9, 4, 5)
+    np.testing.assert_array_equal(
+        _expand_anim_value(Reader(data), 0, 10), [10, 20, 30, 30, 30, -7, -7, 4, 5, 5])
+    np.testing.assert_array_equal(_expand_anim_value(Reader(data), 0, 3), [10, 20, 30])
+
+
+@pytest.mark.parametrize('head', [(0, 4), (2, 0)])
+def test_expand_anim_value_broken(head):
+    data = struct.pack('=BBh', 1, 2, 1) + struct.pack('=BB', *head) + bytes(8)
+    with pytest.raises(Exception, match='broken animation value'):
+        _expand_anim_value(Reader(data), 0, 5)
+
+
+@pytest.mark.parametrize('num_frames, section_frames', [(12, 4), (13, 4), (10, 3), (4, 4), (3, 8), (61, 30)])
+def test_sections(num_frames, section_frames):
+    model = generate(num_anims=1, num_frames=num_frames, section_frames=section_frames)
+    anim_desc = MDL(model.mdl).anim_descs[0]
+    spans = _section_spans(num_frames, section_frames)
+    assert anim_desc.num_sections == len(spans)
+    counts = [anim_desc._section_frame_count(s) for s in range(len(spans))]
+    # never more frames than a section stores
+    assert all(count <= stored for (count, (_, stored)) in zip(counts, spans))
+
+    (sections, local) = anim_desc._frame_sections(np.arange(num_frames))
+    for frame, (section, index) in enumerate(zip(sections.tolist(), local.tolist())):
+        assert spans[section][0] + index == frame
+        # every frame is decoded by its section
+        assert 0 <= index < counts[section]
+    if num_frames > section_frames:
+        # the last frame lives in a section of its own
+        assert (sections[-1], local[-1]) == (len(spans) - 1, 0)
+
+
+def test_sectioned_pose_matches_frames():
+    # every frame decoded from its own section matches the same frame of a whole clip decode
+    model = generate(num_anims=2, num_frames=13, section_frames=4)
+    for anim_desc in MDL(model.mdl).anim_descs:
+        (pos, quat) = anim_desc.local_pose()
+        for frame in range(13):
+            (p, q) = anim_desc.local_pose([frame])
+            np.testing.assert_array_equal(p[0], pos[frame])
+            np.testing.assert_array_equal(q[0], quat[frame])
@@ -0,0 +1,35 @@
+import os
+
+from srcstudiomodel.batch import load_batch
+
+
+def _load(path, lazy):
+    # a worker that loads a file named crash* dies without a word
+    if os.path.basename(path).startswith('crash'):
+        os._exit(1)
+    return os.path.basename(path)
+
+
+def test_load_batch():
+    paths = ['m%d.mdl' % i for i in range(10)]
+    results = list(load_batch(paths, str.upper, workers=2, chunksize=3, loader=_load))
+    assert sorted(result.path for result in results) == paths
+    assert all(result.ok and result.value == result.path.upper() for result in results)
+
+
+def test_dead_worker_fails_only_its_file():
+    paths = ['m%d.mdl' % i for i in range(20)]
+    paths[5] = 'crash5.mdl'
+    paths[13] = 'crash13.mdl'
+    progress = []
+    results = list(load_batch(
+        paths, str.upper, workers=2, chunksize=3, loader=_load,
+        progress=lambda done, total, result: progress.append((done, total)),
+    ))
+    assert sorted(result.path for result in results) == sorted(paths)
+    assert progress == [(done, 20) for done in range(1, 21)]
+    for result in results:
+        if result.path.startswith('crash'):
+            assert result.error.startswith('BrokenProcessPool')
+        else:
+            assert result.ok and result.value == result.path.upper()
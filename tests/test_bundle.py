@@ -0,0 +1,71 @@
+import os
+import re
+import struct
+
+import pytest
+
+from benchmarks.synthetic import generate
+from srcstudiomodel import ModelBundle
+
+
+def _patch(path, offset, format, *values):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(struct.pack(format, *values))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return generate(num_lods=2).write(tmp_path)
+
+
+def test_lazy_reads_headers_only(path):
+    bundle = ModelBundle(path, lazy=True)
+    assert 'bodyparts' not in bundle.mdl.__dict__
+    assert len(bundle.vvd.vertex_array) == sum(
+        model.num_vertices for bodypart in bundle.mdl.bodyparts for model in bodypart.models)
+
+
+@pytest.mark.parametrize('suffix, offset, format, value, match', [
+    ('.vvd', 8, '=I', 1, 'checksum of vvd does not match mdl'),
+    ('.dx90.vtx', 16, '=I', 1, 'checksum of vtx does not match mdl'),
+    ('.vvd', 12, '=i', 3, 'lod count of vvd and vtx does not match'),
+    ('.vvd', 16, '=i', 119, 'vertex count of vvd does not match mdl'),
+    ('.vvd', 0, '=I', 0, 'this is not vvd file'),
+])
+def test_rejected(path, suffix, offset, format, value, match):
+    file = os.path.splitext(path)[0] + suffix
+    _patch(file, offset, format, value)
+    with pytest.raises(Exception, match=match) as info:
+        ModelBundle(path, lazy=True)
+    assert str(info.value).endswith(': %s' % (path if 'lod count' in match else file))
+
+
+def test_not_vtx(path):
+    vtx = os.path.splitext(path)[0] + '.dx90.vtx'
+    with open(vtx, 'wb') as f:
+        f.write(b'\0' * 8)
+    with pytest.raises(Exception, match=re.escape('this is not vtx file: %s' % vtx)):
+        ModelBundle(path, lazy=True)
+
+
+def test_not_mdl(path):
+    _patch(path, 0, '=I', 0)
+    with pytest.raises(Exception, match=re.escape('this is not mdl file: %s' % path)):
+        ModelBundle(path, lazy=True)
+
+
+@pytest.mark.parametrize('suffix', ['.vvd', '.dx90.vtx'])
+def test_missing_sibling(path, suffix):
+    os.remove(os.path.splitext(path)[0] + suffix)
+    with pytest.raises(Exception, match=re.escape('vvd or vtx is missing: %s' % path)):
+        ModelBundle(path, lazy=True)
+
+
+def test_without_meshes(path):
+    # animation only models have neither
+    base = os.path.splitext(path)[0]
+    os.remove(base + '.vvd')
+    os.remove(base + '.dx90.vtx')
+    bundle = ModelBundle(path)
+    assert bundle.vvd is None and bundle.vtx is None
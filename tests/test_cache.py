@@ -0,0 +1,90 @@
+import json
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate
+from srcstudiomodel import MDL, VTX, VVD, ModelCache, assemble
+
+
+def _truncate(data: bytes) -> bytes:
+    return data[:len(data) // 2]
+
+
+def _bad_json(data: bytes) -> bytes:
+    (_, _, size) = struct.unpack_from('=8sII', data)
+    return data[:16] + b'{' * size + data[16 + size:]
+
+
+def _missing_array(data: bytes) -> bytes:
+    (magic, version, size) = struct.unpack_from('=8sII', data)
+    header = json.loads(data[16:16 + size])
+    header['arrays'] = header['arrays'][:-1]
+    text = json.dumps(header).encode().ljust(size)
+    return data[:16] + text + data[16 + size:]
+
+
+@pytest.mark.parametrize('corrupt', [
+    _truncate,
+    _bad_json,
+    _missing_array,
+    lambda data: b'',
+    lambda data: b'NOTCACHE' + data[8:],
+])
+def test_corrupt_file_is_rebuilt(tmp_path, corrupt):
+    path = generate(num_lods=2).write(tmp_path)
+    cache = ModelCache(tmp_path / 'cache')
+    expected = [(batch.material, batch.indices.copy(), batch.vertices.copy()) for batch in cache.load(path).batches]
+    file = os.path.join(cache.directory, cache.key(path) + '.cache')
+    with open(file, 'rb') as f:
+        data = f.read()
+    # replaced rather than rewritten, the old file is still mapped
+    with open(file + '.tmp', 'wb') as f:
+        f.write(corrupt(data))
+    os.replace(file + '.tmp', file)
+
+    model = cache.load(path)
+    assert [batch.material for batch in model.batches] == [material for (material, _, _) in expected]
+    for batch, (_, indices, vertices) in zip(model.batches, expected):
+        np.testing.assert_array_equal(batch.indices, indices)
+        np.testing.assert_array_equal(batch.vertices, vertices)
+    with open(file, 'rb') as f:
+        assert f.read() == data
+
+
+def test_reduced_lod(tmp_path):
+    model = generate(num_lods=3, reduce_lods=True)
+    path = model.write(tmp_path)
+    cache = ModelCache(tmp_path / 'cache')
+    (mdl, vtx, vvd) = (MDL(model.mdl), VTX(model.vtx), VVD(model.vvd))
+    for lod in range(3):
+        cached = cache.load(path, lod=lod)
+        batches = assemble(mdl, vtx, vvd, lod)
+        assert [batch.material for batch in cached.batches] == [batch.material.name for batch in batches]
+        for batch, expected in zip(cached.batches, batches):
+            np.testing.assert_array_equal(batch.vertex_ids, expected.vertex_ids)
+            np.testing.assert_array_equal(batch.indices, expected.indices)
+        assert sum(len(batch.vertex_ids) for batch in cached.batches) == vvd.num_lod_vertexes[lod] // 2
+
+
+def test_key(tmp_path):
+    path = generate().write(tmp_path)
+    cache = ModelCache(tmp_path / 'cache')
+    key = cache.key(path)
+    assert cache.key(path) == key and cache.key(path, lod=1) != key
+    # a new checksum gives a new key, even with the same size and mtime
+    st = os.stat(path)
+    with open(path, 'r+b') as f:
+        f.seek(8)
+        f.write(struct.pack('=I', MDL(path).checksum ^ 1))
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cache.key(path) != key
+
+
+def test_key_of_non_mdl(tmp_path):
+    with open(tmp_path / 'a.mdl', 'wb') as f:
+        f.write(b'\0' * 1024)
+    with pytest.raises(Exception, match='this is not mdl file'):
+        ModelCache(tmp_path / 'cache').key(tmp_path / 'a.mdl')
@@ -0,0 +1,55 @@
+import os
+
+from benchmarks.synthetic import generate
+from srcstudiomodel.catalog import Catalog
+
+
+def test_update(tmp_path):
+    path = generate().write(tmp_path, 'a')
+    with Catalog(tmp_path / 'catalog.db') as catalog:
+        stats = catalog.update(tmp_path, workers=1)
+        assert (stats.parsed, stats.failed) == (1, 0)
+        assert catalog.models_with_texture('MATERIAL/TEX1') == [os.path.abspath(path)]
+        assert catalog.models_with_activity('ACT_RUN') == [os.path.abspath(path)]
+        assert catalog.models_with_bone('bone3') == [os.path.abspath(path)]
+        assert catalog.update(tmp_path, workers=1).unchanged == 1
+
+
+def test_model_without_valid_vvd(tmp_path):
+    # only the mdl is cataloged, so a broken or missing .vvd or .vtx does not hide the model
+    path = generate().write(tmp_path, 'a')
+    with open(tmp_path / 'a.vvd', 'wb') as f:
+        f.write(b'\0' * 64)
+    os.remove(tmp_path / 'a.dx90.vtx')
+    with Catalog(tmp_path / 'catalog.db') as catalog:
+        stats = catalog.update(tmp_path, workers=1)
+        assert (stats.parsed, stats.failed) == (1, 0)
+        assert catalog.failures() == []
+        assert catalog.models_with_texture('material/tex0') == [os.path.abspath(path)]
+
+
+def test_broken_mdl(tmp_path):
+    with open(tmp_path / 'a.mdl', 'wb') as f:
+        f.write(b'\0' * 64)
+    with Catalog(tmp_path / 'catalog.db') as catalog:
+        stats = catalog.update(tmp_path, workers=1)
+        assert (stats.parsed, stats.failed) == (0, 1)
+        assert [path for (path, _) in catalog.failures()] == [os.path.abspath(tmp_path / 'a.mdl')]
+
+
+def test_edit_keeping_size_and_checksum(tmp_path):
+    # renaming a material in place keeps both the size and the header checksum of the mdl
+    path = generate().write(tmp_path, 'a')
+    with Catalog(tmp_path / 'catalog.db') as catalog:
+        catalog.update(tmp_path, workers=1)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data.replace(b'material/tex1\0', b'material/tex9\0'))
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+
+        stats = catalog.update(tmp_path, workers=1)
+        assert (stats.parsed, stats.unchanged) == (1, 0)
+        assert catalog.models_with_texture('material/tex9') == [os.path.abspath(path)]
+        assert catalog.models_with_texture('material/tex1') == []
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from srcstudiomodel import compressed
+
+_COUNT = 20000
+
+
+def _valid(scalar, data: bytes, size: int) -> bytes:
+    # packed quaternions whose x, y and z leave a real w
+    out = bytearray()
+    for i in range(0, len(data), size):
+        try:
+            scalar(data, i)
+        except ValueError:
+            continue
+        out += data[i:i + size]
+    return bytes(out)
+
+
+@pytest.mark.parametrize('scalar, array, size', [
+    (compressed.vec32, compressed.vec32_array, 4),
+    (compressed.vec48, compressed.vec48_array, 6),
+    (compressed.quat48, compressed.quat48_array, 6),
+    (compressed.quat64, compressed.quat64_array, 8),
+])
+def test_array_matches_scalar(scalar, array, size):
+    data = np.random.default_rng(size).integers(0, 256, _COUNT * size, np.uint8).tobytes()
+    if scalar in (compressed.quat48, compressed.quat64):
+        data = _valid(scalar, data, size)
+    if scalar is compressed.vec48:
+        # half float nans never compare equal
+        values = np.frombuffer(data, '<f2')
+        values = values[np.isfinite(values)]
+        data = values[:len(values) // 3 * 3].tobytes()
+    num = len(data) // size
+    assert num > _COUNT // 8
+
+    expected = np.array([scalar(data, i * size) for i in range(num)])
+    decoded = array(data)
+    assert decoded.dtype == np.float64
+    np.testing.assert_array_equal(decoded, expected)
+    # num and offset pick a run of values from the middle of a buffer
+    np.testing.assert_array_equal(array(data, 5, size * 3), expected[3:8])
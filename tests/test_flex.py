@@ -0,0 +1,164 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate
+from srcstudiomodel import MDL, MDL_VERTANIM_DTYPE, VVD, VVD_VERTEX_DTYPE, Morph
+from srcstudiomodel.flex import _run_rule
+
+
+def _ramp(value, targets):
+    (x, y, z, w) = targets
+    if value <= x or value >= w:
+        return 0.0
+    if value < y:
+        return (value - x) / (y - x)
+    if value > z:
+        return (w - value) / (w - z)
+    return 1.0
+
+
+def _lod0_rows(vvd):
+    if len(vvd.fixup_array) == 0:
+        return list(range(vvd.num_lod_vertexes[0]))
+    rows = []
+    for fixup in vvd.fixup_array:
+        if fixup['lod'] >= 0:
+            rows.extend(range(fixup['source_vertex_id'], fixup['source_vertex_id'] + fixup['num_vertexes']))
+    return rows
+
+
+def _naive_apply(mdl, vvd, weights):
+    # one flex and one vertex at a time
+    rows = _lod0_rows(vvd)
+    positions = vvd.vertex_array['position'].astype(np.float64)
+    normals = vvd.vertex_array['normal'].astype(np.float64)
+    for bodypart in mdl.bodyparts:
+        for model in bodypart.models:
+            for mesh in model.meshes:
+                for flex in mesh.flexes:
+                    w1 = _ramp(weights[flex.flex_desc], flex.targets)
+                    w2 = _ramp(weights[flex.flex_pair], flex.targets)
+                    for anim in flex.vert_anims:
+                        side = anim['side'] / 255.0
+                        weight = w1 * (1.0 - side) + w2 * side
+                        row = rows[model.vertex_index // VVD_VERTEX_DTYPE.itemsize + mesh.vertex_offset + anim['index']]
+                        positions[row] += weight * anim['delta'].astype(np.float64)
+                        normals[row] += weight * anim['ndelta'].astype(np.float64)
+    return positions, normals
+
+
+def _load(**kwargs):
+    model = generate(num_flexes=3, num_models=2, meshes_per_model=2, verts_per_mesh=40, **kwargs)
+    return MDL(model.mdl), VVD(model.vvd)
+
+
+def test_flex_tables():
+    (mdl, _) = _load()
+    assert [desc.name for desc in mdl.flex_descs] == ['flex0', 'flex1', 'flex2']
+    assert [controller.name for controller in mdl.flex_controllers] == ['controller0', 'controller1', 'controller2']
+    assert [(controller.min, controller.max) for controller in mdl.flex_controllers] == [(0.0, 1.0)] * 3
+    for f, rule in enumerate(mdl.flex_rules):
+        assert rule.flex == f
+        assert [(op, index) for (op, index, _) in rule.ops][::2] == [(2, f), (6, 0)]
+        assert rule.ops[1][0] == 1 and rule.ops[1][2] == 1.0
+    for model in mdl.bodyparts[0].models:
+        for mesh in model.meshes:
+            assert [flex.flex_desc for flex in mesh.flexes] == [0, 1, 2]
+            assert [flex.flex_pair for flex in mesh.flexes] == [1, 2, 0]
+            for flex in mesh.flexes:
+                assert flex.targets == (0.0, 1.0, 1.0, 2.0)
+                assert flex.vert_anims.dtype == MDL_VERTANIM_DTYPE
+                assert len(flex.vert_anims) == flex.num_verts == 4
+                assert flex.vert_anims['index'].max() < mesh.num_vertices
+
+
+@pytest.mark.parametrize('num_lods', [1, 3])
+def test_apply_matches_naive(num_lods):
+    (mdl, vvd) = _load(num_lods=num_lods)
+    if num_lods > 1:
+        assert len(vvd.fixup_array) > 0
+    morph = Morph(mdl, vvd)
+    controllers = {'controller0': 0.25, 'controller2': 1.0}
+    weights = morph.flex_weights(controllers)
+    np.testing.assert_allclose(weights, [0.25, 0.0, 1.0])
+
+    (positions, normals) = morph.apply(vvd, controllers)
+    (expected_positions, expected_normals) = _naive_apply(mdl, vvd, weights)
+    assert positions.dtype == np.float32
+    np.testing.assert_allclose(positions, expected_positions, atol=1e-5)
+    np.testing.assert_allclose(normals, expected_normals, atol=1e-5)
+    assert (positions != vvd.vertex_array['position']).any()
+
+
+def test_apply_batch():
+    (mdl, vvd) = _load(num_lods=3)
+    morph = Morph(mdl, vvd)
+    values = np.array([[0.0, 0.0, 0.0], [0.5, 0.0, 0.0], [1.0, 0.3, 0.7]])
+    (positions, normals) = morph.apply(vvd.vertex_array, values.reshape(3, 1, 3))
+    assert positions.shape == normals.shape == (3, 1, len(vvd.vertex_array), 3)
+    np.testing.assert_array_equal(positions[0, 0], vvd.vertex_array['position'])
+    for i, row in enumerate(values):
+        single = morph.apply(vvd, row)
+        np.testing.assert_array_equal(positions[i, 0], single[0])
+        np.testing.assert_array_equal(normals[i, 0], single[1])
+
+
+def test_controller_values():
+    (mdl, vvd) = _load()
+    morph = Morph(mdl, vvd)
+    np.testing.assert_array_equal(morph.controller_values({'controller1': [2.0, -1.0]}), [[0, 1, 0], [0, 0, 0]])
+    with pytest.raises(Exception, match='unknown flex controller'):
+        morph.controller_values({'jaw_drop': 1.0})
+    with pytest.raises(ValueError):
+        morph.controller_values(np.zeros(2))
+
+
+def test_no_flexes():
+    model = generate()
+    (mdl, vvd) = (MDL(model.mdl), VVD(model.vvd))
+    morph = Morph(mdl, vvd)
+    assert morph.num_flexes == 0
+    (positions, _) = morph.apply(vvd, {})
+    np.testing.assert_array_equal(positions, vvd.vertex_array['position'])
+
+
+_SRC = np.array([[-0.5, 0.25, 0.8, 3.0]])
+
+
+@pytest.mark.parametrize('ops, expected', [
+    ([(1, 0, 1.5)], 1.5),
+    ([(2, 2, 0)], 0.8),
+    ([(3, 1, 0)], 4.0),
+    ([(2, 1, 0), (2, 2, 0), (4, 0, 0)], 1.05),
+    ([(2, 1, 0), (2, 2, 0), (5, 0, 0)], -0.55),
+    ([(2, 1, 0), (2, 2, 0), (6, 0, 0)], 0.2),
+    ([(2, 1, 0), (2, 2, 0), (7, 0, 0)], 0.3125),
+    ([(2, 1, 0), (1, 0, 0.0), (7, 0, 0)], 0.0),
+    ([(2, 2, 0), (8, 0, 0)], -0.8),
+    ([(2, 1, 0), (2, 2, 0), (13, 0, 0)], 0.8),
+    ([(2, 1, 0), (2, 2, 0), (14, 0, 0)], 0.25),
+    ([(15, 0, 0)], 0.5),
+    ([(16, 1, 0)], 0.25),
+    # the product of the last three values replaces them
+    ([(1, 0, 7.0), (2, 1, 0), (2, 2, 0), (2, 3, 0), (18, 3, 0), (4, 0, 0)], 7.0 + 0.25 * 0.8 * 3.0),
+    # the value below the last two is scaled by one minus their product
+    ([(2, 3, 0), (2, 1, 0), (2, 2, 0), (19, 2, 0)], 3.0 * (1.0 - 0.25 * 0.8)),
+    # ramp (0, 0.5, 1, 4) of controller 2 times controller 1
+    ([(1, 0, 0.0), (1, 0, 0.5), (1, 0, 1.0), (1, 0, 4.0), (1, 0, 2.0), (17, 1, 0)], 0.25),
+    # ramp (0, 0.9, 1, 4) of controller 2 rises at 0.8
+    ([(1, 0, 0.0), (1, 0, 0.9), (1, 0, 1.0), (1, 0, 4.0), (1, 0, 2.0), (17, 1, 0)], 0.8 / 0.9 * 0.25),
+    # ramp (0, 0.1, 0.5, 1) of controller 2 falls at 0.8
+    ([(1, 0, 0.0), (1, 0, 0.1), (1, 0, 0.5), (1, 0, 1.0), (1, 0, 2.0), (17, 3, 0)], 0.4 * 3.0),
+])
+def test_run_rule(ops, expected):
+    rule = SimpleNamespace(flex=0, ops=[(op, index, float(value)) for (op, index, value) in ops])
+    dest = np.array([[0.0, 4.0]])
+    np.testing.assert_allclose(_run_rule(rule, _SRC, dest), [expected])
+
+
+def test_run_rule_unsupported():
+    rule = SimpleNamespace(flex=0, ops=[(20, 0, 0.0)])
+    with pytest.raises(Exception, match='unsupported flex op'):
+        _run_rule(rule, _SRC, np.zeros((1, 1)))
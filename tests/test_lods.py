@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate
+from srcstudiomodel import VTX, VVD, ModelBundle, assemble
+
+_MODEL = generate(num_models=2, meshes_per_model=2, verts_per_mesh=30, num_lods=3, reduce_lods=True)
+
+
+def _rows(vvd, lod):
+    # rows of vertex_array of a lod, one fixup at a time
+    rows = []
+    for fixup in vvd.fixup_array:
+        if fixup['lod'] >= lod:
+            rows.extend(range(fixup['source_vertex_id'], fixup['source_vertex_id'] + fixup['num_vertexes']))
+    return rows
+
+
+@pytest.mark.parametrize('lod', [0, 1, 2])
+def test_lod_vertices(lod):
+    full = VVD(_MODEL.vvd)
+    rows = _rows(full, lod)
+    assert len(rows) == full.num_lod_vertexes[lod]
+    # past lod 0 the fixups leave vertices out
+    assert (len(rows) < len(full.vertex_array)) == (lod > 0)
+    for vvd in (full, VVD(_MODEL.vvd, lods=[lod])):
+        np.testing.assert_array_equal(vvd.lod_vertex_indices(lod), rows)
+        np.testing.assert_array_equal(vvd.lod_vertices(lod), full.vertex_array[rows])
+        np.testing.assert_array_equal(vvd.lod_tangents(lod), full.tangent_array[rows])
+
+
+def test_vvd_lods_not_loaded():
+    vvd = VVD(_MODEL.vvd, lods=[1])
+    assert vvd.lods == (1,)
+    for lod in (0, 2):
+        with pytest.raises(Exception, match='lod %d of vvd is not loaded' % lod):
+            vvd.lod_vertices(lod)
+
+
+def test_vtx_skips_lods():
+    full = VTX(_MODEL.vtx)
+    vtx = VTX(_MODEL.vtx, lods=[1])
+    assert vtx.lods == (1,)
+    for body_part, full_body_part in zip(vtx.body_parts, full.body_parts):
+        for model, full_model in zip(body_part.models, full_body_part.models):
+            assert model.model_lods[0] is None and model.model_lods[2] is None
+            for mesh, full_mesh in zip(model.model_lods[1].meshes, full_model.model_lods[1].meshes):
+                for group, full_group in zip(mesh.strip_groups, full_mesh.strip_groups):
+                    np.testing.assert_array_equal(group.vertex_array, full_group.vertex_array)
+                    np.testing.assert_array_equal(group.index_array, full_group.index_array)
+
+
+def test_bundle_lod(tmp_path):
+    path = _MODEL.write(tmp_path)
+    bundle = ModelBundle(path, lods=[2])
+    full = ModelBundle(path)
+    expected = assemble(full.mdl, full.vtx, full.vvd, 2)
+    batches = assemble(bundle.mdl, bundle.vtx, bundle.vvd, 2)
+    assert [batch.material.name for batch in batches] == [batch.material.name for batch in expected]
+    for batch, other in zip(batches, expected):
+        np.testing.assert_array_equal(batch.vertex_ids, other.vertex_ids)
+        np.testing.assert_array_equal(batch.vertices, other.vertices)
+        np.testing.assert_array_equal(batch.indices, other.indices)
+    with pytest.raises(Exception, match='lod 0 of vtx is not loaded'):
+        assemble(bundle.mdl, bundle.vtx, bundle.vvd, 0)
+
+
+@pytest.mark.parametrize('lods', [[3], [9], [-1], [0, 3]])
+def test_lods_out_of_range(lods):
+    with pytest.raises(Exception, match='of vvd is out of range'):
+        VVD(_MODEL.vvd, lods=lods)
+    with pytest.raises(Exception, match='of vtx is out of range'):
+        VTX(_MODEL.vtx, lods=lods)
+
+
+def test_lod_out_of_range():
+    with pytest.raises(Exception, match='lod 3 of vvd is out of range'):
+        VVD(_MODEL.vvd).lod_vertices(3)
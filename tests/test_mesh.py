@@ -0,0 +1,74 @@
+import struct
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate
+from srcstudiomodel import MDL, VTX, VVD, VVD_VERTEX_DTYPE, assemble
+
+
+def _load(mdl: bytes, model):
+    return MDL(mdl), VTX(model.vtx), VVD(model.vvd)
+
+
+def _triangles(batches):
+    # every triangle as sorted VVD vertex ids, in a canonical order
+    triangles = np.concatenate([batch.vertex_ids[batch.indices].reshape(-1, 3) for batch in batches])
+    triangles = np.sort(triangles, axis=1)
+    return triangles[np.lexsort(triangles.T[::-1])]
+
+
+def test_batch_per_texture():
+    model = generate(meshes_per_model=4, num_textures=4, num_lods=3)
+    batches = assemble(*_load(model.mdl, model))
+    assert sorted(batch.material.name for batch in batches) == ['material/tex%d' % t for t in range(4)]
+
+
+def test_skinrefs_sharing_a_texture_share_a_batch():
+    model = generate(meshes_per_model=4, num_textures=4, num_lods=3)
+    mdl = MDL(model.mdl)
+    # family 0 draws skinrefs 0 and 2 with texture 1, 1 and 3 with texture 3
+    data = bytearray(model.mdl)
+    struct.pack_into('=4h', data, mdl.header.skin_index, 1, 3, 1, 3)
+    shared = assemble(*_load(bytes(data), model))
+    assert sorted(batch.material.name for batch in shared) == ['material/tex1', 'material/tex3']
+
+    separate = assemble(*_load(model.mdl, model))
+    np.testing.assert_array_equal(_triangles(shared), _triangles(separate))
+    vertices = VVD(model.vvd).vertex_array
+    for batch in shared:
+        np.testing.assert_array_equal(batch.vertices, vertices[batch.vertex_ids])
+
+
+def _lod0_rows(vvd):
+    # rows of vertex_array of the lod 0 vertices, one fixup at a time
+    rows = []
+    for fixup in vvd.fixup_array:
+        rows.extend(range(fixup['source_vertex_id'], fixup['source_vertex_id'] + fixup['num_vertexes']))
+    return rows
+
+
+@pytest.mark.parametrize('body', [0, 1])
+def test_reduced_lods(body):
+    # every lod keeps the first vertices of a mesh, so a lod vertex is the lod 0 vertex of the same mesh index
+    model = generate(num_models=2, meshes_per_model=2, verts_per_mesh=30, num_lods=3, reduce_lods=True)
+    (mdl, vtx, vvd) = _load(model.mdl, model)
+    assert vvd.num_lod_vertexes[:3] == [120, 60, 28]
+    rows = _lod0_rows(vvd)
+    assert sorted(rows) == list(range(120)) and rows != sorted(rows)
+
+    for lod in range(3):
+        batches = assemble(mdl, vtx, vvd, lod, body=body)
+        expected = []
+        selected = mdl.bodyparts[0].models[body]
+        base = selected.vertex_index // VVD_VERTEX_DTYPE.itemsize
+        for mesh, vtx_mesh in zip(selected.meshes, vtx.body_parts[0].models[body].model_lods[lod].meshes):
+            for group in vtx_mesh.strip_groups:
+                ids = group.vertex_array['orig_mesh_vert_id'][group.index_array]
+                assert ids.max() < mesh.num_lod_vertexes[lod]
+                expected.append(np.array(rows)[base + mesh.vertex_offset + ids])
+        expected = np.sort(np.concatenate(expected).reshape(-1, 3), axis=1)
+        np.testing.assert_array_equal(_triangles(batches), expected[np.lexsort(expected.T[::-1])])
+        for batch in batches:
+            np.testing.assert_array_equal(batch.vertices, vvd.vertex_array[batch.vertex_ids])
+            np.testing.assert_array_equal(batch.tangents, vvd.tangent_array[batch.vertex_ids])
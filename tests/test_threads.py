@@ -0,0 +1,92 @@
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate
+from srcstudiomodel import MDL, Instrument, ModelBundle
+
+_THREADS = 16
+
+
+@pytest.fixture(autouse=True)
+def switch_often():
+    # threads switch much more often than the default 5ms, so that races show up
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def _run(func, *args):
+    # func on every thread at once, returning their results
+    barrier = threading.Barrier(_THREADS)
+
+    def start():
+        barrier.wait()
+        return func(*args)
+
+    with ThreadPoolExecutor(_THREADS) as threads:
+        return [future.result() for future in [threads.submit(start) for _ in range(_THREADS)]]
+
+
+@pytest.mark.parametrize('repeat', range(5))
+def test_concurrent_load(repeat):
+    # every table is parsed once however many threads load it at the same time
+    model = generate(num_anims=4, num_frames=30, section_frames=8, num_flexes=2)
+    instrument = Instrument()
+    mdl = MDL(model.mdl, lazy=True, instrument=instrument)
+    with ThreadPoolExecutor(4) as executor:
+        _run(mdl.load, executor)
+    counts = Counter(record.table for record in instrument.records if record.file == 'mdl')
+    assert all(counts[name] == 1 for name in MDL._tables)
+    assert all(bone.table is mdl.bone_table for bone in mdl.bones)
+    assert all(anim_desc._bones is mdl.bone_table for anim_desc in mdl.anim_descs)
+
+    expected = MDL(model.mdl)
+    assert [bone.name for bone in mdl.bones] == [bone.name for bone in expected.bones]
+    assert [seq_desc.label for seq_desc in mdl.seq_descs] == [seq_desc.label for seq_desc in expected.seq_descs]
+
+
+def test_concurrent_bundle(tmp_path):
+    path = generate(num_lods=2).write(tmp_path)
+    with ThreadPoolExecutor(4) as executor:
+        bundles = _run(ModelBundle, path, False, None, None, None, executor)
+    expected = ModelBundle(path)
+    for bundle in bundles:
+        np.testing.assert_array_equal(bundle.vvd.vertex_array, expected.vvd.vertex_array)
+        assert len(bundle.mdl.bodyparts) == len(expected.mdl.bodyparts)
+
+
+def test_concurrent_sample(tmp_path):
+    # threads sampling one model through caches too small for them, sections keep being
+    # evicted and decoded again while others read them
+    path = generate(num_anims=3, num_frames=61, section_frames=6, anim_block_size=300).write(tmp_path)
+    mdl = MDL(path, ani=path[:-4] + '.ani')
+    mdl.ani.block_cache_size = 1
+    for anim_desc in mdl.anim_descs:
+        anim_desc.section_cache_size = 2
+    reference = MDL(path, ani=path[:-4] + '.ani')
+    frames = np.random.default_rng(0).uniform(0, 60, (_THREADS, 20))
+    expected = [[anim_desc.sample(row) for anim_desc in reference.anim_descs] for row in frames]
+
+    index = iter(range(_THREADS))
+    lock = threading.Lock()
+
+    def sample():
+        with lock:
+            i = next(index)
+        results = []
+        for _ in range(2):
+            for frame in frames[i]:
+                results.append([anim_desc.sample([frame]) for anim_desc in mdl.anim_descs])
+        return i, results
+
+    for i, results in _run(sample):
+        for n, result in enumerate(results):
+            for (pos, quat), (expected_pos, expected_quat) in zip(result, expected[i]):
+                np.testing.assert_array_equal(pos[0], expected_pos[n % len(frames[i])])
+                np.testing.assert_array_equal(quat[0], expected_quat[n % len(frames[i])])